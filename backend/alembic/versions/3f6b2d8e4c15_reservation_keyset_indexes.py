@@ -0,0 +1,28 @@
+"""reservation keyset pagination indexes
+
+Revision ID: 3f6b2d8e4c15
+Revises: 8c1d4e2a9b73
+Create Date: 2026-10-18 14:03:27.884512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2d8e4c15'
+down_revision: Union[str, None] = '8c1d4e2a9b73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reservations_start_time_id', 'reservations', ['start_time', 'id'], unique=False)
+    op.create_index('ix_reservations_user_id_start_time_id', 'reservations', ['user_id', 'start_time', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_user_id_start_time_id', table_name='reservations')
+    op.drop_index('ix_reservations_start_time_id', table_name='reservations')
@@ -0,0 +1,32 @@
+"""court day versions for listing etags
+
+Revision ID: 5a9e3c7d1f02
+Revises: 3f6b2d8e4c15
+Create Date: 2026-10-18 16:21:09.412337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e3c7d1f02'
+down_revision: Union[str, None] = '3f6b2d8e4c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('court_day_versions',
+    sa.Column('court_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['court_id'], ['courts.id'], ),
+    sa.PrimaryKeyConstraint('court_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('court_day_versions')
@@ -0,0 +1,43 @@
+"""reservation overlap exclusion constraint
+
+Revision ID: 8c1d4e2a9b73
+Revises: 52f10ab267f5
+Create Date: 2026-10-18 10:12:41.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d4e2a9b73'
+down_revision: Union[str, None] = '52f10ab267f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist provides the "=" operator class for UUIDs inside a GiST index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('reservations', sa.Column(
+        'period',
+        postgresql.TSRANGE(),
+        sa.Computed("tsrange(start_time, end_time, '[)')", persisted=True),
+        nullable=True,
+    ))
+    # Fails if the table already holds overlapping active reservations; cancel those first
+    op.create_exclude_constraint(
+        'reservations_no_overlap',
+        'reservations',
+        ('court_id', '='),
+        ('period', '&&'),
+        using='gist',
+        where=sa.text("status <> 'cancelled'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('reservations_no_overlap', 'reservations', type_='exclude')
+    op.drop_column('reservations', 'period')
@@ -0,0 +1,28 @@
+"""reminder scan indexes
+
+Revision ID: 9d2f6a1c8e47
+Revises: 5a9e3c7d1f02
+Create Date: 2026-10-18 17:02:44.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f6a1c8e47'
+down_revision: Union[str, None] = '5a9e3c7d1f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reservations_status_start_time', 'reservations', ['status', 'start_time'], unique=False)
+    op.create_index('uq_reservation_events_reminder', 'reservation_events', ['reservation_id'], unique=True, postgresql_where=sa.text("type = 'reminder'"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_reservation_events_reminder', table_name='reservation_events', postgresql_where=sa.text("type = 'reminder'"))
+    op.drop_index('ix_reservations_status_start_time', table_name='reservations')
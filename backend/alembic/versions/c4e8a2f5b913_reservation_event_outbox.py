@@ -0,0 +1,30 @@
+"""reservation event outbox
+
+Revision ID: c4e8a2f5b913
+Revises: 9d2f6a1c8e47
+Create Date: 2026-10-18 17:48:12.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f5b913'
+down_revision: Union[str, None] = '9d2f6a1c8e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reservation_events', sa.Column('sent_at', sa.DateTime(), nullable=True))
+    # Events that existed before the outbox are not replayed
+    op.execute("UPDATE reservation_events SET sent_at = created_at")
+    op.create_index('ix_reservation_events_unsent', 'reservation_events', ['created_at'], unique=False, postgresql_where=sa.text('sent_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservation_events_unsent', table_name='reservation_events', postgresql_where=sa.text('sent_at IS NULL'))
+    op.drop_column('reservation_events', 'sent_at')
@@ -0,0 +1,43 @@
+"""user daily usage counters
+
+Revision ID: e7b3f9a2c604
+Revises: c4e8a2f5b913
+Create Date: 2026-10-18 19:42:31.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3f9a2c604'
+down_revision: Union[str, None] = 'c4e8a2f5b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_daily_usage',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('period', sa.String(length=1), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('seconds', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'day')
+    )
+    # Backfill day, week and month counters from the live reservations
+    for period, trunc in (('D', 'day'), ('W', 'week'), ('M', 'month')):
+        op.execute(f"""
+            INSERT INTO user_daily_usage (user_id, period, day, seconds)
+            SELECT user_id, '{period}', CAST(date_trunc('{trunc}', start_time) AS date),
+                   CAST(sum(extract(epoch FROM end_time - start_time)) AS integer)
+            FROM reservations
+            WHERE status <> 'cancelled'
+            GROUP BY 1, 2, 3
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_daily_usage')
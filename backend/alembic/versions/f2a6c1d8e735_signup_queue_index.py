@@ -0,0 +1,29 @@
+"""signup approval queue index
+
+Revision ID: f2a6c1d8e735
+Revises: e7b3f9a2c604
+Create Date: 2026-10-18 20:27:54.130916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c1d8e735'
+down_revision: Union[str, None] = 'e7b3f9a2c604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_signup_approval_requests_tower_status_created', 'signup_approval_requests', ['tower_id', 'status', 'created_at'], unique=False)
+    # Covered by the leading column of the composite index
+    op.drop_index(op.f('ix_signup_approval_requests_tower_id'), table_name='signup_approval_requests')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_signup_approval_requests_tower_id'), 'signup_approval_requests', ['tower_id'], unique=False)
+    op.drop_index('ix_signup_approval_requests_tower_status_created', table_name='signup_approval_requests')
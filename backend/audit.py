@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import logging
+import uuid
+from datetime import datetime
+from sqlalchemy import exc, insert
+from config import settings
+from models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE classes of errors that are about the connection or the server, not the rows:
+# connection exception, insufficient resources, operator intervention (shutdown, cancel)
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "53", "57")
+
+def _is_transient(error: Exception) -> bool:
+    """True when the insert may succeed later unchanged, so the batch is kept."""
+    if isinstance(error, (OSError, asyncio.TimeoutError, exc.TimeoutError)):
+        return True
+    if isinstance(error, exc.DBAPIError):
+        if error.connection_invalidated or isinstance(error, exc.InterfaceError):
+            return True
+        sqlstate = getattr(error.orig, "sqlstate", None) or ""
+        return sqlstate[:2] in _TRANSIENT_SQLSTATE_CLASSES
+    return False
+
+class AuditWriter:
+    """Buffers audit entries in process and writes them with multi-row INSERTs.
+
+    record() only appends to the buffer, so routers pay no round-trip. A
+    background task flushes when flush_size entries are waiting or every
+    flush_interval seconds. When the buffer is full, record() waits for the
+    next flush (backpressure); it only drops the entry when no flush frees
+    space within full_wait_seconds. A batch that fails for a connection-level
+    reason is kept and retried; one the database rejects is split until the
+    bad entry is isolated, which is logged and dropped. close() flushes
+    whatever is left and runs at shutdown.
+    """
+
+    def __init__(self, max_buffer: int, flush_size: int, flush_interval: float, full_wait_seconds: float = 5):
+        self.max_buffer = max_buffer
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.full_wait_seconds = full_wait_seconds
+        self._buffer: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    async def record(self, action: str, entity_type: str, entity_id, actor_user_id: uuid.UUID | None = None, meta: dict | None = None):
+        if self._task is None:
+            # Fresh context: flushes must not be counted as SQL of the request that started the writer
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+        if len(self._buffer) >= self.max_buffer:
+            self._wakeup.set()
+            try:
+                async with self._space:
+                    await asyncio.wait_for(
+                        self._space.wait_for(lambda: len(self._buffer) < self.max_buffer),
+                        timeout=self.full_wait_seconds,
+                    )
+            except asyncio.TimeoutError:
+                # The database has been unreachable for a while; don't hang the request
+                logger.error("audit buffer full, dropping %s on %s %s", action, entity_type, entity_id)
+                return
+        self._buffer.append({
+            "id": uuid.uuid4(),
+            "actor_user_id": actor_user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": str(entity_id),
+            "meta": meta or {},
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._buffer) >= self.flush_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        from database import get_sessionmaker
+        size = self.flush_size
+        while self._buffer:
+            batch = self._buffer[:size]
+            try:
+                async with get_sessionmaker()() as db:
+                    await db.execute(insert(AuditLog).values(batch))
+                    await db.commit()
+            except Exception as e:
+                if _is_transient(e):
+                    # Keep the entries and try again on the next tick
+                    logger.exception("audit flush of %d entries failed", len(batch))
+                    return
+                if len(batch) > 1:
+                    # Something in the batch is rejected: halve it until the bad entry is alone
+                    size = len(batch) // 2
+                    continue
+                entry = batch[0]
+                logger.exception("dropping audit entry %s on %s %s rejected by the database", entry["action"], entry["entity_type"], entry["entity_id"])
+            else:
+                size = min(size * 2, self.flush_size)
+            del self._buffer[:len(batch)]
+            async with self._space:
+                self._space.notify_all()
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._closing = False
+
+audit_log = AuditWriter(settings.AUDIT_BUFFER_SIZE, settings.AUDIT_FLUSH_SIZE, settings.AUDIT_FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,83 @@
+import re
+from datetime import date, datetime, timedelta
+
+# Slot states, one character per slot in the encoded grid
+FREE = "F"
+RESERVED = "R"
+BLACKOUT = "B"
+MINE = "M"
+
+SLOT_LEGEND = {FREE: "free", RESERVED: "reserved", BLACKOUT: "blackout", MINE: "mine"}
+
+_SLOT_RE = re.compile(r"^(\d+)(m|h)$")
+
+
+def parse_slot(value: str) -> int:
+    """Parse a slot size such as "30m" or "1h" into minutes (must divide a day evenly)."""
+    m = _SLOT_RE.match(value.strip().lower())
+    if not m:
+        raise ValueError("Invalid slot, use e.g. 15m, 30m or 1h")
+    minutes = int(m.group(1)) * (60 if m.group(2) == "h" else 1)
+    if minutes < 5 or 1440 % minutes != 0:
+        raise ValueError("Slot must be at least 5m and divide 24h evenly")
+    return minutes
+
+
+class SlotGrid:
+    """Bitset view of a contiguous window split into fixed-size slots.
+
+    Each state is kept as a Python int where bit i means slot i is covered, so
+    marking an interval is one shift/or regardless of its length.
+    """
+
+    def __init__(self, start: date, days: int, slot_minutes: int):
+        self.origin = datetime.combine(start, datetime.min.time())
+        self.days = days
+        self.slot = timedelta(minutes=slot_minutes)
+        self.slots_per_day = 1440 // slot_minutes
+        self.total = days * self.slots_per_day
+        self.reserved = 0
+        self.mine = 0
+        self.blackout = 0
+
+    @property
+    def end(self) -> datetime:
+        return self.origin + self.slot * self.total
+
+    def _mask(self, start: datetime, end: datetime) -> int:
+        lo = max(0, (start - self.origin) // self.slot)
+        # ceil division so partially covered slots count as taken
+        hi = min(self.total, -((self.origin - end) // self.slot))
+        if hi <= lo:
+            return 0
+        return ((1 << (hi - lo)) - 1) << lo
+
+    def mark_reserved(self, start: datetime, end: datetime, is_mine: bool = False):
+        mask = self._mask(start, end)
+        if is_mine:
+            self.mine |= mask
+        else:
+            self.reserved |= mask
+
+    def mark_blackout(self, start: datetime, end: datetime):
+        self.blackout |= self._mask(start, end)
+
+    def state(self, i: int) -> str:
+        bit = 1 << i
+        if self.blackout & bit:
+            return BLACKOUT
+        if self.mine & bit:
+            return MINE
+        if self.reserved & bit:
+            return RESERVED
+        return FREE
+
+    def encode_days(self) -> list[dict]:
+        out = []
+        for d in range(self.days):
+            base = d * self.slots_per_day
+            out.append({
+                "date": (self.origin + timedelta(days=d)).date(),
+                "slots": "".join(self.state(base + i) for i in range(self.slots_per_day)),
+            })
+        return out
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import BlackoutWindow
+
+logger = logging.getLogger(__name__)
+
+CHANGES_CHANNEL = "blackouts:changed"
+
+@dataclass(frozen=True)
+class Blackout:
+    id: uuid.UUID
+    start_time: datetime
+    end_time: datetime
+    reason: str
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+def _build(items: list[Blackout]) -> _Node | None:
+    if not items:
+        return None
+    center = sorted(b.start_time for b in items)[len(items) // 2]
+    here, left, right = [], [], []
+    for b in items:
+        if b.end_time <= center:
+            left.append(b)
+        elif b.start_time > center:
+            right.append(b)
+        else:
+            here.append(b)
+    return _Node(
+        center,
+        sorted(here, key=lambda b: b.start_time),
+        sorted(here, key=lambda b: b.end_time, reverse=True),
+        _build(left),
+        _build(right),
+    )
+
+class IntervalTree:
+    """Static centered interval tree over half-open [start_time, end_time) blackouts.
+
+    Every node keeps the intervals containing its center sorted by start and
+    by end, so a query walks one root-to-leaf path plus the matches. The tree
+    is immutable; changes rebuild it from scratch.
+    """
+
+    def __init__(self, items: list[Blackout] = ()):
+        self.size = len(items)
+        self._root = _build(list(items))
+
+    def query(self, start: datetime, end: datetime) -> list[Blackout]:
+        found = []
+        node = self._root
+        stack = []
+        while node is not None or stack:
+            if node is None:
+                node = stack.pop()
+            if end <= node.center:
+                for b in node.by_start:
+                    if b.start_time >= end:
+                        break
+                    found.append(b)
+                node = node.left
+            elif start > node.center:
+                for b in node.by_end:
+                    if b.end_time <= start:
+                        break
+                    found.append(b)
+                node = node.right
+            else:
+                found += node.by_start
+                if node.right is not None:
+                    stack.append(node.right)
+                node = node.left
+        return found
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        node = self._root
+        stack = []
+        while node is not None or stack:
+            if node is None:
+                node = stack.pop()
+            if end <= node.center:
+                if node.by_start and node.by_start[0].start_time < end:
+                    return True
+                node = node.left
+            elif start > node.center:
+                if node.by_end and node.by_end[0].end_time > start:
+                    return True
+                node = node.right
+            else:
+                return True
+        return False
+
+class BlackoutIndex:
+    """Process-local tree of the active and future blackouts for the booking hot path.
+
+    The tree is loaded on first use and rebuilt on the next lookup after a
+    change: writers call notify_changed() after commit, which marks this
+    process stale and, with REDIS_URL set, tells every other process through a
+    pub/sub channel. refresh_seconds bounds staleness if a notification is
+    lost and drops windows that have ended.
+    """
+
+    def __init__(self, redis_url: str | None, refresh_seconds: float):
+        self.redis_url = redis_url
+        self.refresh_seconds = refresh_seconds
+        self._tree: IntervalTree | None = None
+        self._loaded_at = 0.0
+        # Bumped on every change notification; the tree is current when it was built from the latest one
+        self._change_seq = 0
+        self._built_seq = -1
+        self._reload_lock = asyncio.Lock()
+        self._redis = None
+        self._listener: asyncio.Task | None = None
+
+    def _stale(self) -> bool:
+        return (
+            self._tree is None
+            or self._built_seq != self._change_seq
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    async def current(self, db: AsyncSession) -> IntervalTree:
+        # Reloads on the caller's session: a separate connection could wait on
+        # a pool held by the very requests queued behind the reload
+        if self.redis_url and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        if self._stale():
+            async with self._reload_lock:
+                if self._stale():
+                    await self._reload(db)
+        return self._tree
+
+    async def _reload(self, db: AsyncSession):
+        seq = self._change_seq
+        res = await db.execute(
+            select(BlackoutWindow.id, BlackoutWindow.start_time, BlackoutWindow.end_time, BlackoutWindow.reason)
+            .where(BlackoutWindow.end_time > datetime.utcnow())
+        )
+        items = [Blackout(*row) for row in res.all()]
+        self._tree = IntervalTree(items)
+        self._built_seq = seq
+        self._loaded_at = time.monotonic()
+
+    def _client(self):
+        if self._redis is None:
+            # Imported on first use to keep redis out of cold start
+            from redis import asyncio as aioredis
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    def mark_stale(self):
+        self._change_seq += 1
+
+    async def notify_changed(self):
+        """Call after a blackout change is committed."""
+        self.mark_stale()
+        if not self.redis_url:
+            return
+        try:
+            await self._client().publish(CHANGES_CHANNEL, "1")
+        except Exception:
+            # Other processes catch up within refresh_seconds
+            logger.warning("blackout change notification failed", exc_info=True)
+
+    async def _listen(self):
+        delay = 0.5
+        while True:
+            try:
+                pubsub = self._client().pubsub()
+                await pubsub.subscribe(CHANGES_CHANNEL)
+                # Changes made while we were not subscribed are unknown
+                self.mark_stale()
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.mark_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("blackout subscription lost, reconnecting in %.1fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+blackout_index = BlackoutIndex(settings.REDIS_URL, settings.BLACKOUT_REFRESH_SECONDS)
@@ -0,0 +1,435 @@
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from enum import Enum
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from blackouts import blackout_index
+from config import settings
+from court_versions import bump_court_days
+from models import EventType, Reservation, ReservationEvent, ReservationStatus, RESERVATION_OVERLAP_CONSTRAINT
+
+DAILY_LIMIT_SECONDS = 2 * 3600
+_UNLIMITED_SECONDS = 2**31 - 1
+MAX_RESERVATION_DURATION = timedelta(hours=2)
+MAX_BATCH_OCCURRENCES = 200
+
+class BookingFailure(str, Enum):
+    COURT_NOT_FOUND = "court_not_found"
+    USER_NOT_FOUND = "user_not_found"
+    USER_INACTIVE = "user_inactive"
+    UNDERAGE = "underage"
+    TOWER_SCOPE = "tower_scope"
+    DAILY_LIMIT = "daily_limit"
+    WEEKLY_LIMIT = "weekly_limit"
+    MONTHLY_LIMIT = "monthly_limit"
+    OVERLAP = "overlap"
+    BLACKOUT = "blackout"
+
+# HTTP status and detail for each failure, matching the messages the router always returned
+FAILURE_RESPONSES = {
+    BookingFailure.COURT_NOT_FOUND: (404, "Court not found"),
+    BookingFailure.USER_NOT_FOUND: (404, "Target user not found"),
+    BookingFailure.USER_INACTIVE: (403, "Target user is not active"),
+    BookingFailure.UNDERAGE: (403, "Only 18+ can reserve the court"),
+    BookingFailure.TOWER_SCOPE: (403, "Tower scope violation."),
+    BookingFailure.DAILY_LIMIT: (400, "Daily limit exceeded (max 2h/day)"),
+    BookingFailure.WEEKLY_LIMIT: (400, "Weekly limit exceeded"),
+    BookingFailure.MONTHLY_LIMIT: (400, "Monthly limit exceeded"),
+    BookingFailure.OVERLAP: (409, "Time slot already reserved"),
+    BookingFailure.BLACKOUT: (409, "Court unavailable (blackout window)"),
+}
+
+PERIOD_FAILURES = {"D": BookingFailure.DAILY_LIMIT, "W": BookingFailure.WEEKLY_LIMIT, "M": BookingFailure.MONTHLY_LIMIT}
+
+# Batch item statuses besides "created" and the BookingFailure values
+ITEM_CREATED = "created"
+ITEM_INVALID_TIME = "invalid_time"
+ITEM_DUPLICATE = "duplicate"
+ITEM_SKIPPED = "skipped"
+
+@dataclass
+class BookingResult:
+    reservation: dict | None = None
+    failure: BookingFailure | None = None
+
+def _limit_for(period_column: str) -> str:
+    return f"""CASE {period_column}
+        WHEN 'D' THEN CAST(:daily_limit AS integer)
+        WHEN 'W' THEN CAST(:weekly_limit AS integer)
+        ELSE CAST(:monthly_limit AS integer)
+    END"""
+
+# Conditional upsert tail shared by single and batch bookings: a counter is
+# only raised while it stays within its period's limit. A counter that would
+# exceed it is left untouched and is missing from RETURNING. Every statement
+# that touches a user's counters locks them in (period, day) order, ahead of
+# the court_day_versions rows, so concurrent bookings, batches and cancels of
+# the same user queue up instead of deadlocking.
+_USAGE_ORDER_SQL = """
+    ORDER BY p.period, p.day"""
+
+_USAGE_CONFLICT_SQL = """
+    ON CONFLICT (user_id, period, day) DO UPDATE SET seconds = user_daily_usage.seconds + EXCLUDED.seconds
+    WHERE user_daily_usage.seconds + EXCLUDED.seconds <= """ + _limit_for("user_daily_usage.period")
+
+# Court and target-user rules shared by single and batch bookings; expects the
+# target user joined as "t"
+_ELIGIBILITY_CASES = """
+        WHEN NOT EXISTS (SELECT 1 FROM courts WHERE id = :court_id AND is_active) THEN 'court_not_found'
+        WHEN t.id IS NULL THEN 'user_not_found'
+        WHEN t.status <> 'active' THEN 'user_inactive'
+        WHEN t.birth_date IS NULL OR t.birth_date >= :adult_before THEN 'underage'
+        WHEN CAST(:scope_tower_id AS uuid) IS NOT NULL
+             AND t.tower_id IS DISTINCT FROM CAST(:scope_tower_id AS uuid) THEN 'tower_scope'"""
+
+# Validates court, target user, 18+, tower scope and overlap, charges the
+# usage counters and inserts the reservation in one round-trip. The verdict CTE
+# yields the first failing rule (or NULL). The quota CTE charges the day, week
+# and month counters in user_daily_usage with the conditional upsert, and the
+# INSERT only fires when every period was granted; concurrent bookings of the
+# same user serialize on the counter rows. The bump CTE advances the (court,
+# day) listing version and the event CTE writes the outbox row along with the
+# insert.
+_BOOK_SQL = text("""
+WITH target AS (
+    SELECT id, status, birth_date, tower_id FROM users WHERE id = :user_id
+),
+verdict AS (
+    SELECT CASE""" + _ELIGIBILITY_CASES + """
+        WHEN EXISTS (
+            SELECT 1 FROM reservations
+            WHERE court_id = :court_id
+              AND status <> 'cancelled'
+              AND start_time < :end_time AND end_time > :start_time
+        ) THEN 'overlap'
+    END AS failure
+    FROM (SELECT 1) AS one LEFT JOIN target t ON true
+),
+quota AS (
+    INSERT INTO user_daily_usage (user_id, period, day, seconds)
+    SELECT :user_id, p.period, p.day, CAST(:duration AS integer)
+    FROM verdict CROSS JOIN unnest(CAST(:periods AS text[]), CAST(:period_days AS date[])) AS p(period, day)
+    WHERE verdict.failure IS NULL AND CAST(:duration AS integer) <= """ + _limit_for("p.period") + _USAGE_ORDER_SQL + _USAGE_CONFLICT_SQL + """
+    RETURNING period
+),
+granted AS (
+    SELECT coalesce(array_agg(period), '{}') AS periods FROM quota
+),
+ins AS (
+    INSERT INTO reservations (id, court_id, user_id, created_by_user_id, start_time, end_time, status, created_at, notes)
+    SELECT :id, :court_id, :user_id, :created_by_user_id, :start_time, :end_time, 'confirmed', :created_at, :notes
+    FROM verdict, granted
+    WHERE verdict.failure IS NULL AND cardinality(granted.periods) = cardinality(CAST(:periods AS text[]))
+    RETURNING id, court_id, user_id, created_by_user_id, start_time, end_time, status, created_at, cancelled_by, notes
+),
+bump AS (
+    INSERT INTO court_day_versions (court_id, day, version)
+    SELECT court_id, CAST(start_time AS date), 1 FROM ins
+    ON CONFLICT (court_id, day) DO UPDATE SET version = court_day_versions.version + 1
+),
+event AS (
+    INSERT INTO reservation_events (id, reservation_id, type, payload, created_at)
+    SELECT :event_id, id, 'created',
+           jsonb_build_object('court_id', court_id, 'user_id', user_id, 'start_time', start_time, 'end_time', end_time),
+           created_at
+    FROM ins
+)
+SELECT verdict.failure, granted.periods AS granted_periods, ins.*
+FROM verdict CROSS JOIN granted LEFT JOIN ins ON true
+""")
+
+_ELIGIBILITY_SQL = text("""
+SELECT CASE""" + _ELIGIBILITY_CASES + """
+    END AS failure
+FROM (SELECT 1) AS one LEFT JOIN users t ON t.id = :user_id
+""")
+
+# Overlap for every occurrence of a batch in one statement
+_BATCH_CHECK_SQL = text("""
+SELECT occ.idx,
+       EXISTS (
+           SELECT 1 FROM reservations r
+           WHERE r.court_id = :court_id
+             AND r.status <> 'cancelled'
+             AND r.start_time < occ.e AND r.end_time > occ.s
+       ) AS overlap
+FROM unnest(CAST(:starts AS timestamp[]), CAST(:ends AS timestamp[])) WITH ORDINALITY AS occ(s, e, idx)
+ORDER BY occ.idx
+""")
+
+_USAGE_SQL = text("""
+SELECT period, day, seconds FROM user_daily_usage
+WHERE user_id = :user_id AND day = ANY(CAST(:days AS date[]))
+""")
+
+_CHARGE_USAGE_SQL = text("""
+INSERT INTO user_daily_usage (user_id, period, day, seconds)
+SELECT :user_id, p.period, p.day, p.seconds
+FROM unnest(CAST(:periods AS text[]), CAST(:period_days AS date[]), CAST(:seconds AS integer[])) AS p(period, day, seconds)
+WHERE p.seconds <= """ + _limit_for("p.period") + _USAGE_ORDER_SQL + _USAGE_CONFLICT_SQL + """
+RETURNING period
+""")
+
+_RELEASE_USAGE_SQL = text("""
+WITH locked AS (
+    SELECT u.period, u.day FROM user_daily_usage u
+    JOIN unnest(CAST(:periods AS text[]), CAST(:period_days AS date[])) AS p(period, day)
+      ON u.period = p.period AND u.day = p.day
+    WHERE u.user_id = :user_id""" + _USAGE_ORDER_SQL + """
+    FOR UPDATE OF u
+)
+UPDATE user_daily_usage SET seconds = greatest(seconds - CAST(:duration AS integer), 0)
+FROM locked
+WHERE user_daily_usage.user_id = :user_id
+  AND user_daily_usage.period = locked.period AND user_daily_usage.day = locked.day
+""")
+
+def usage_keys(start_time: datetime) -> list[tuple[str, date]]:
+    """Counters a reservation starting at start_time is charged to, as (period, period start):
+    the day itself ("D"), the Monday of its week ("W") and the 1st of its month ("M")."""
+    day = start_time.date()
+    return [("D", day), ("W", day - timedelta(days=day.weekday())), ("M", day.replace(day=1))]
+
+def usage_limits() -> dict[str, int]:
+    return {
+        "daily_limit": DAILY_LIMIT_SECONDS,
+        "weekly_limit": settings.WEEKLY_LIMIT_SECONDS or _UNLIMITED_SECONDS,
+        "monthly_limit": settings.MONTHLY_LIMIT_SECONDS or _UNLIMITED_SECONDS,
+    }
+
+async def release_usage(db: AsyncSession, user_id: uuid.UUID, start_time: datetime, end_time: datetime):
+    """Give a cancelled reservation's time back to its counters; runs in the cancel transaction."""
+    keys = usage_keys(start_time)
+    await db.execute(_RELEASE_USAGE_SQL, {
+        "user_id": user_id,
+        "duration": int((end_time - start_time).total_seconds()),
+        "periods": [period for period, _ in keys],
+        "period_days": [day for _, day in keys],
+    })
+
+def adult_birth_cutoff(today: date | None = None) -> datetime:
+    """Birth datetimes strictly before this instant belong to someone 18+ today."""
+    today = today or date.today()
+    try:
+        cutoff = today.replace(year=today.year - 18)
+    except ValueError:
+        # 29 Feb: the birthday is considered reached on 28 Feb in non-leap years
+        cutoff = today.replace(year=today.year - 18, day=28)
+    return datetime.combine(cutoff + timedelta(days=1), datetime.min.time())
+
+def event_payload(court_id: uuid.UUID, user_id: uuid.UUID, start_time: datetime, end_time: datetime) -> dict:
+    # Same shape as the jsonb_build_object in _BOOK_SQL
+    return {
+        "court_id": str(court_id),
+        "user_id": str(user_id),
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+    }
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    return RESERVATION_OVERLAP_CONSTRAINT in str(exc.orig)
+
+async def book_reservation(
+    db: AsyncSession,
+    *,
+    court_id: uuid.UUID,
+    user_id: uuid.UUID,
+    created_by_user_id: uuid.UUID,
+    start_time: datetime,
+    end_time: datetime,
+    notes: str | None = None,
+    scope_tower_id: uuid.UUID | None = None,
+) -> BookingResult:
+    """Run the single-statement booking. The caller owns the transaction and commits on success."""
+    # Blackouts come from the in-process tree, not the database
+    if (await blackout_index.current(db)).overlaps(start_time, end_time):
+        return BookingResult(failure=BookingFailure.BLACKOUT)
+    keys = usage_keys(start_time)
+    params = {
+        "id": uuid.uuid4(),
+        "event_id": uuid.uuid4(),
+        "court_id": court_id,
+        "user_id": user_id,
+        "created_by_user_id": created_by_user_id,
+        "start_time": start_time,
+        "end_time": end_time,
+        "notes": notes,
+        "created_at": datetime.utcnow(),
+        "adult_before": adult_birth_cutoff(),
+        "scope_tower_id": scope_tower_id,
+        "duration": int((end_time - start_time).total_seconds()),
+        "periods": [period for period, _ in keys],
+        "period_days": [day for _, day in keys],
+        **usage_limits(),
+    }
+    try:
+        row = (await db.execute(_BOOK_SQL, params)).mappings().one()
+    except IntegrityError as e:
+        # A concurrent booking won the slot between our snapshot and the insert
+        await db.rollback()
+        if is_overlap_violation(e):
+            return BookingResult(failure=BookingFailure.OVERLAP)
+        raise
+    if row["failure"] is not None or row["id"] is None:
+        # Rolls back counters already charged for the periods that had room
+        await db.rollback()
+        if row["failure"] is not None:
+            return BookingResult(failure=BookingFailure(row["failure"]))
+        exceeded = next(period for period, _ in keys if period not in row["granted_periods"])
+        return BookingResult(failure=PERIOD_FAILURES[exceeded])
+    reservation = dict(row)
+    del reservation["failure"], reservation["granted_periods"]
+    return BookingResult(reservation=reservation)
+
+@dataclass
+class BatchItemResult:
+    start_time: datetime
+    end_time: datetime
+    status: str = ITEM_CREATED
+    detail: str | None = None
+    reservation_id: uuid.UUID | None = None
+
+    def fail(self, status: str, detail: str):
+        self.status = status
+        self.detail = detail
+
+@dataclass
+class BatchResult:
+    failure: BookingFailure | None = None
+    items: list[BatchItemResult] = field(default_factory=list)
+
+async def book_batch(
+    db: AsyncSession,
+    *,
+    court_id: uuid.UUID,
+    user_id: uuid.UUID,
+    created_by_user_id: uuid.UUID,
+    occurrences: list[tuple[datetime, datetime]],
+    notes: str | None = None,
+    scope_tower_id: uuid.UUID | None = None,
+    all_or_nothing: bool = False,
+) -> BatchResult:
+    """Validate every occurrence with set-based queries and insert the valid ones together.
+
+    A failure on the court or target user rejects the whole batch; everything
+    else is reported per item. The caller owns the transaction and commits.
+    """
+    row = (await db.execute(_ELIGIBILITY_SQL, {
+        "court_id": court_id,
+        "user_id": user_id,
+        "adult_before": adult_birth_cutoff(),
+        "scope_tower_id": scope_tower_id,
+    })).one()
+    if row.failure is not None:
+        await db.rollback()
+        return BatchResult(failure=BookingFailure(row.failure))
+
+    items = [BatchItemResult(start, end) for start, end in occurrences]
+    planned: dict[tuple[str, date], int] = defaultdict(int)
+    blackouts = await blackout_index.current(db)
+    candidates = []
+    for item in items:
+        duration = item.end_time - item.start_time
+        if duration <= timedelta(0) or duration > MAX_RESERVATION_DURATION:
+            item.fail(ITEM_INVALID_TIME, "Invalid duration (max 2h per reservation)")
+        elif blackouts.overlaps(item.start_time, item.end_time):
+            item.fail(BookingFailure.BLACKOUT.value, FAILURE_RESPONSES[BookingFailure.BLACKOUT][1])
+        else:
+            candidates.append(item)
+
+    if candidates:
+        res = await db.execute(_BATCH_CHECK_SQL, {
+            "court_id": court_id,
+            "starts": [item.start_time for item in candidates],
+            "ends": [item.end_time for item in candidates],
+        })
+        for idx, overlap in res.all():
+            if overlap:
+                candidates[idx - 1].fail(BookingFailure.OVERLAP.value, FAILURE_RESPONSES[BookingFailure.OVERLAP][1])
+
+        period_days = {day for item in candidates for _, day in usage_keys(item.start_time)}
+        res = await db.execute(_USAGE_SQL, {"user_id": user_id, "days": sorted(period_days)})
+        used = {(period, day): seconds for period, day, seconds in res.all()}
+        limits = usage_limits()
+        period_limits = {"D": limits["daily_limit"], "W": limits["weekly_limit"], "M": limits["monthly_limit"]}
+
+        # Within the batch: chronological order, no self-overlap, quotas including earlier items
+        last_end = None
+        for item in sorted(candidates, key=lambda i: i.start_time):
+            if item.status != ITEM_CREATED:
+                continue
+            if last_end is not None and item.start_time < last_end:
+                item.fail(ITEM_DUPLICATE, "Overlaps another occurrence in this batch")
+                continue
+            seconds = int((item.end_time - item.start_time).total_seconds())
+            keys = usage_keys(item.start_time)
+            exceeded = next((
+                period for period, day in keys
+                if used.get((period, day), 0) + planned.get((period, day), 0) + seconds > period_limits[period]
+            ), None)
+            if exceeded:
+                failure = PERIOD_FAILURES[exceeded]
+                item.fail(failure.value, FAILURE_RESPONSES[failure][1])
+                continue
+            for key in keys:
+                planned[key] += seconds
+            last_end = item.end_time
+
+    accepted = [item for item in items if item.status == ITEM_CREATED]
+    if all_or_nothing and len(accepted) != len(items):
+        for item in accepted:
+            item.fail(ITEM_SKIPPED, "Batch rejected because another occurrence failed")
+        accepted = []
+    if not accepted:
+        await db.rollback()
+        return BatchResult(items=items)
+
+    created_at = datetime.utcnow()
+    rows = []
+    for item in accepted:
+        item.reservation_id = uuid.uuid4()
+        rows.append({
+            "id": item.reservation_id,
+            "court_id": court_id,
+            "user_id": user_id,
+            "created_by_user_id": created_by_user_id,
+            "start_time": item.start_time,
+            "end_time": item.end_time,
+            "status": ReservationStatus.CONFIRMED,
+            "created_at": created_at,
+            "notes": notes,
+        })
+    try:
+        # Same lock order as _BOOK_SQL: counters, then the reservations, then the day versions
+        charged = (await db.execute(_CHARGE_USAGE_SQL, {
+            "user_id": user_id,
+            "periods": [period for period, _ in planned],
+            "period_days": [day for _, day in planned],
+            "seconds": list(planned.values()),
+            **usage_limits(),
+        })).all()
+        if len(charged) != len(planned):
+            # Another booking of the same user took the room between our read and this charge
+            await db.rollback()
+            return BatchResult(failure=BookingFailure.DAILY_LIMIT)
+        await db.execute(insert(Reservation), rows)
+        await bump_court_days(db, court_id, (item.start_time.date() for item in accepted))
+        await db.execute(insert(ReservationEvent).values([
+            {
+                "id": uuid.uuid4(),
+                "reservation_id": row["id"],
+                "type": EventType.CREATED,
+                "payload": event_payload(court_id, user_id, row["start_time"], row["end_time"]),
+                "created_at": created_at,
+            }
+            for row in rows
+        ]))
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            return BatchResult(failure=BookingFailure.OVERLAP)
+        raise
+    return BatchResult(items=items)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Iterable
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """Process-local stand-in for Redis (bounded LRU with per-key TTL)."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float | None, Any]] = OrderedDict()
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value, ttl: float | None):
+        self._entries[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str):
+        return self._live(key)
+
+    async def mget(self, keys: list[str]) -> list:
+        return [self._live(k) for k in keys]
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        self._store(key, value, ttl)
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def incr_many(self, keys: list[str]):
+        for key in keys:
+            self._store(key, int(self._live(key) or 0) + 1, None)
+
+class RedisBackend:
+    def __init__(self, url: str):
+        # Imported on first use to keep redis out of cold start
+        from redis import asyncio as aioredis
+        self.client = aioredis.from_url(url)
+
+    async def get(self, key: str):
+        return await self.client.get(key)
+
+    async def mget(self, keys: list[str]) -> list:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    async def incr_many(self, keys: list[str]):
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+
+class Cache:
+    """JSON cache over Redis (or the in-memory backend) with single-flight recomputation.
+
+    Cached values are keyed by generation counters: writers bump the
+    generation of every (court, day) they touched after commit, so readers
+    stop seeing old entries without any key scanning, and old entries age out
+    through their TTL. Backend errors degrade to computing the value directly.
+    """
+
+    def __init__(self, backend, ttl_seconds: float, lock_timeout_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        try:
+            raw = await self.backend.get(key)
+        except Exception:
+            logger.warning("cache get failed for %s", key, exc_info=True)
+            return await compute()
+        if raw is not None:
+            return json.loads(raw)
+
+        # Single flight within the process: later callers await the first one
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._compute_shared(key, compute)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _compute_shared(self, key: str, compute):
+        # Single flight across processes: one holder of the lock recomputes,
+        # the others poll for its result until the lock times out
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            locked = await self.backend.add(lock_key, token, ttl=self.lock_timeout_seconds)
+        except Exception:
+            locked = False
+        if not locked:
+            deadline = time.monotonic() + self.lock_timeout_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                try:
+                    raw = await self.backend.get(key)
+                except Exception:
+                    break
+                if raw is not None:
+                    return json.loads(raw)
+        try:
+            value = await compute()
+            try:
+                await self.backend.set(key, json.dumps(value, default=str), ttl=self.ttl_seconds)
+            except Exception:
+                logger.warning("cache set failed for %s", key, exc_info=True)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.backend.delete(lock_key)
+                except Exception:
+                    pass
+
+    async def generations(self, keys: list[str]) -> list[int]:
+        try:
+            return [int(v or 0) for v in await self.backend.mget(keys)]
+        except Exception:
+            logger.warning("cache generation lookup failed", exc_info=True)
+            # Unique generation: forces a miss instead of serving stale data
+            return [-time.monotonic_ns()] * len(keys)
+
+    async def bump(self, keys: list[str]):
+        try:
+            await self.backend.incr_many(keys)
+        except Exception:
+            logger.warning("cache invalidation failed for %s", keys, exc_info=True)
+
+# --- Court/day keys -------------------------------------------------------
+
+BLACKOUTS_GENERATION_KEY = "gen:blackouts"
+
+def day_generation_key(day: date, court_id: uuid.UUID | None = None) -> str:
+    return f"gen:{court_id or 'all'}:{day.isoformat()}"
+
+def _window_days(start: date, days: int) -> list[date]:
+    # The day before counts too: a reservation can start there and cross midnight
+    return [start + timedelta(days=i) for i in range(-1, days)]
+
+async def availability_key(court_id: uuid.UUID, start: date, days: int) -> str:
+    gen_keys = [day_generation_key(d, court_id) for d in _window_days(start, days)] + [BLACKOUTS_GENERATION_KEY]
+    gens = await get_cache().generations(gen_keys)
+    return f"avail:{court_id}:{start.isoformat()}:{days}:{'.'.join(map(str, gens))}"
+
+async def listing_key(day: date, court_id: uuid.UUID | None, cursor: str | None, limit: int) -> str:
+    gen = (await get_cache().generations([day_generation_key(day, court_id)]))[0]
+    return f"list:{court_id or 'all'}:{day.isoformat()}:{cursor or ''}:{limit}:{gen}"
+
+async def invalidate_court_days(court_id: uuid.UUID, days: Iterable[date]):
+    """Call after the reservation change is committed."""
+    keys = []
+    for day in set(days):
+        keys += [day_generation_key(day, court_id), day_generation_key(day)]
+    await get_cache().bump(keys)
+
+async def invalidate_blackouts():
+    await get_cache().bump([BLACKOUTS_GENERATION_KEY])
+
+_cache: Cache | None = None
+
+def get_cache() -> Cache:
+    global _cache
+    if _cache is None:
+        backend = RedisBackend(settings.REDIS_URL) if settings.REDIS_URL else MemoryBackend()
+        _cache = Cache(backend, settings.CACHE_TTL_SECONDS, settings.CACHE_LOCK_TIMEOUT_SECONDS)
+    return _cache
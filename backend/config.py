@@ -3,14 +3,45 @@ from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for read-only endpoints; a user's reads stay on the
+    # primary for READ_AFTER_WRITE_SECONDS after they write (replica lag)
+    DATABASE_READ_URL: Optional[str] = None
+    READ_AFTER_WRITE_SECONDS: float = 5
     REDIS_URL: Optional[str] = None
+    # Availability/listing cache (Redis when REDIS_URL is set, else per-process memory)
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCK_TIMEOUT_SECONDS: float = 5
+    # List endpoints select plain columns and encode them with orjson instead of
+    # loading ORM objects and validating response models (see fast_json.py)
+    FAST_LIST_SERIALIZATION: bool = False
+
+    # Connection pool: "queue" (long-running server), "null" (no pooling, e.g.
+    # serverless behind pgbouncer) or "lifo-small" (a couple of LIFO connections)
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    # Connections opened at startup (capped at the pool size, ignored in "null" mode)
+    DB_POOL_WARM: int = 1
     
     # Auth
     JWT_SECRET: str
     JWT_EXPIRES_IN: int = 3600
+    # Lifetime of the query-string token for /courts/{id}/live (EventSource can't send headers)
+    LIVE_TOKEN_SECONDS: int = 60
+    # In-process cache of authenticated users (0 disables)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 1024
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     OAUTH_REDIRECT_URI: str
+    # Google endpoints (overridable to point logins at a local fake)
+    GOOGLE_AUTH_URL: str = "https://accounts.google.com/o/oauth2/v2/auth"
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+    GOOGLE_ISSUERS: str = "https://accounts.google.com,accounts.google.com"
     
     # Frontend
     CORS_ORIGINS: str = "http://localhost:3000"
@@ -18,11 +49,43 @@ class Settings(BaseSettings):
     # Observability
     SENTRY_DSN: Optional[str] = None
     PROMETHEUS_ENABLED: bool = True
+    # Buffered audit log writer: max queued entries, rows per INSERT, flush period
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_FLUSH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
     
     # Notifications (Twilio)
     TWILIO_ACCOUNT_SID: Optional[str] = None
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_FROM: Optional[str] = None
+    # "twilio", "log" or "fake"; defaults to twilio when TWILIO_ACCOUNT_SID is set
+    NOTIFY_TRANSPORT: Optional[str] = None
+    # Events for the same recipient within this window go out as one SMS
+    NOTIFY_BATCH_WINDOW_SECONDS: int = 30
+    # Provider rate limit shared by all workers (token bucket)
+    NOTIFY_RATE_PER_SECOND: float = 1
+    NOTIFY_BURST: int = 5
+
+    # Blackout tree kept by every API process; rebuilt on change notifications
+    # and at least this often
+    BLACKOUT_REFRESH_SECONDS: int = 300
+
+    # Booking quotas on top of the fixed 2h/day, in seconds (unset = no limit)
+    WEEKLY_LIMIT_SECONDS: Optional[int] = None
+    MONTHLY_LIMIT_SECONDS: Optional[int] = None
+
+    # Reminder scheduler (python reminders.py)
+    REMINDER_LEAD_MINUTES: int = 60
+    REMINDER_POLL_SECONDS: int = 60
+    REMINDER_BATCH_SIZE: int = 500
+
+    # Reservation event outbox dispatcher (python outbox.py). Comma-separated
+    # sinks among redis_stream, notifications and log; defaults to
+    # redis_stream,notifications with REDIS_URL, else log
+    OUTBOX_SINKS: Optional[str] = None
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_METRICS_PORT: Optional[int] = None
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -0,0 +1,36 @@
+import uuid
+from datetime import date
+from typing import Iterable
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Runs inside the write transaction; concurrent writers on the same (court, day)
+# serialize on the row lock until commit
+_BUMP_MANY_SQL = text("""
+INSERT INTO court_day_versions (court_id, day, version)
+SELECT :court_id, d, 1 FROM unnest(CAST(:days AS date[])) AS d ORDER BY d
+ON CONFLICT (court_id, day) DO UPDATE SET version = court_day_versions.version + 1
+""")
+
+# Versions only ever grow, so their sum changes whenever any court's day changes
+_DAY_VERSION_SQL = text("""
+SELECT coalesce(sum(version), 0) FROM court_day_versions
+WHERE day = :day AND (CAST(:court_id AS uuid) IS NULL OR court_id = CAST(:court_id AS uuid))
+""")
+
+async def bump_court_days(db: AsyncSession, court_id: uuid.UUID, days: Iterable[date]):
+    """Bump the version of each (court, day); call before the caller commits the change."""
+    await db.execute(_BUMP_MANY_SQL, {"court_id": court_id, "days": sorted(set(days))})
+
+async def day_etag(db: AsyncSession, day: date, court_id: uuid.UUID | None = None) -> str:
+    version = (await db.execute(_DAY_VERSION_SQL, {"day": day, "court_id": court_id})).scalar_one()
+    scope = court_id or "all"
+    return f'"{day.isoformat()}.{scope}.{version}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -1,46 +1,207 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import text
+import asyncio
+import logging
 import os
 import ssl
-import certifi
+import time
 from dotenv import load_dotenv
+from config import settings
 
 load_dotenv()
 
-# Get DB URL from env
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = logging.getLogger(__name__)
+
+def _async_url(url: str | None) -> str | None:
+    # Ensure using async driver for AsyncEngine
+    if url and url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url and url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    return url
 
-# Ensure using async driver for AsyncEngine
-if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-elif DATABASE_URL and DATABASE_URL.startswith("postgresql+psycopg2://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+# Get DB URL from env
+DATABASE_URL = _async_url(os.getenv("DATABASE_URL"))
+# Optional read replica for read-only endpoints (see get_read_db in dependencies.py)
+DATABASE_READ_URL = _async_url(os.getenv("DATABASE_READ_URL"))
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL must be set")
 
-# Configure SSL context with certifi for Supabase pooler
-ssl_context = ssl.create_default_context(cafile=certifi.where())
-# Fallback for self-signed certificates in Supabase pooler
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+_ssl_context: ssl.SSLContext | None = None
+_engine: AsyncEngine | None = None
+_sessionmaker: async_sessionmaker | None = None
+_read_engine: AsyncEngine | None = None
+_read_sessionmaker: async_sessionmaker | None = None
+
+def get_ssl_context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        import certifi
+        # Configure SSL context with certifi for Supabase pooler
+        _ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # Fallback for self-signed certificates in Supabase pooler
+        _ssl_context.check_hostname = False
+        _ssl_context.verify_mode = ssl.CERT_NONE
+    return _ssl_context
+
+POOL_MODES = ("queue", "null", "lifo-small")
+LIFO_SMALL_MAX = 2
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+class _TimedCheckoutMixin:
+    # Time spent getting a connection out of the pool (queueing plus connecting
+    # if a new one is needed), counted per engine: the primary and the replica
+    # each have their own pool and stats
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.stats.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class TimedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+def pool_options(mode: str) -> dict:
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {', '.join(POOL_MODES)}")
+    if mode == "null":
+        return {"poolclass": TimedNullPool}
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if mode == "lifo-small":
+        # Reuse the most recent connection so idle extras can be recycled by the server
+        options["pool_use_lifo"] = True
+        options["pool_size"] = min(settings.DB_POOL_SIZE, LIFO_SMALL_MAX)
+        options["max_overflow"] = min(settings.DB_MAX_OVERFLOW, LIFO_SMALL_MAX)
+    return options
+
+# Engine, SSL context and driver are created on first DB access rather than at
+# import time, which keeps them out of serverless cold-start latency.
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        connect_args={
+            "ssl": get_ssl_context(),
+            "statement_cache_size": 0,  # Disable prepared statements for pgbouncer
+        },
+        **pool_options(settings.DB_POOL_MODE),
+    )
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(DATABASE_URL)
+    return _engine
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    connect_args={
-        "ssl": ssl_context,
-        "statement_cache_size": 0,  # Disable prepared statements for pgbouncer
-    },
-)
+def get_sessionmaker() -> async_sessionmaker:
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(get_engine(), expire_on_commit=False, class_=AsyncSession)
+    return _sessionmaker
 
+def has_read_replica() -> bool:
+    return bool(DATABASE_READ_URL)
 
+def get_read_engine() -> AsyncEngine | None:
+    """Engine of the read replica, None without DATABASE_READ_URL. Same pool settings as the primary."""
+    global _read_engine
+    if _read_engine is None and DATABASE_READ_URL:
+        _read_engine = _create_engine(DATABASE_READ_URL)
+    return _read_engine
 
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+def get_read_sessionmaker() -> async_sessionmaker:
+    # Without a replica, reads go to the primary
+    global _read_sessionmaker
+    if not DATABASE_READ_URL:
+        return get_sessionmaker()
+    if _read_sessionmaker is None:
+        _read_sessionmaker = async_sessionmaker(get_read_engine(), expire_on_commit=False, class_=AsyncSession)
+    return _read_sessionmaker
+
+# Keep `from database import engine, AsyncSessionLocal` working without creating them at import
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    if name == "AsyncSessionLocal":
+        return get_sessionmaker()
+    if name == "ssl_context":
+        return get_ssl_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class Base(DeclarativeBase):
     pass
 
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         yield session
+
+async def warm_pool(target: AsyncEngine | None = None, connections: int | None = None):
+    if settings.DB_POOL_MODE == "null":
+        return
+    target = target or get_engine()
+    pool = target.pool
+    n = min(connections if connections is not None else settings.DB_POOL_WARM, pool.size())
+    if n <= 0:
+        return
+
+    async def _open():
+        async with target.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*[_open() for _ in range(n)])
+    except Exception as e:
+        logger.warning("Connection pool warm-up failed: %s", e)
+
+def pool_status(target: AsyncEngine | None = None) -> dict:
+    target = target or get_engine()
+    pool = target.pool
+    stats = pool.stats
+    status = {
+        "mode": settings.DB_POOL_MODE,
+        "checkouts": stats.checkouts,
+        "checkout_wait_avg_ms": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+        "checkout_wait_max_ms": round(stats.wait_max * 1000, 3),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    return status
@@ -1,14 +1,19 @@
-from fastapi import Depends, HTTPException, status
+import uuid
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select
-from database import get_db
+from database import get_db, get_read_sessionmaker, get_sessionmaker, has_read_replica
 from config import settings
-from security import ALGORITHM
+from security import ALGORITHM, LIVE_TOKEN_SCOPE
 from models import User, UserRole, UserStatus
+from user_cache import CurrentUser, user_cache
+from replica import WRITE_METHODS, recent_writers
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
+# Same header, optional: the live stream also takes a token in the query string
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login", auto_error=False)
 
 def http_401():
     return HTTPException(
@@ -17,23 +22,54 @@ def http_401():
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
-    credentials_exception = http_401()
+def _token_claims(token: str, scope: str | None = None) -> dict:
+    """Verified claims of a token with the given scope (None: a regular access token)."""
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGORITHM])
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise http_401()
+    # A scoped token is only good for its own endpoint
+    if payload.get("sub") is None or payload.get("scope") != scope:
+        raise http_401()
+    return payload
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalars().first()
+async def _user_for(email: str, db: AsyncSession) -> CurrentUser:
+    current = user_cache.get(email)
+    if current is None:
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
+        if user is None:
+            raise http_401()
+        current = CurrentUser.from_user(user)
+        user_cache.put(email, current)
+    return current
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
+    current = await _user_for(_token_claims(token)["sub"], db)
+    if request.method in WRITE_METHODS and has_read_replica():
+        # Marked before the write runs, so the user's reads never race it to the replica
+        await recent_writers.mark(current.id)
+    return current
+
+async def get_read_db_sessionmaker(current_user: CurrentUser = Depends(get_current_user)) -> async_sessionmaker:
+    """The replica's sessionmaker, unless the user wrote within READ_AFTER_WRITE_SECONDS."""
+    if has_read_replica() and await recent_writers.wrote_recently(current_user.id):
+        return get_sessionmaker()
+    return get_read_sessionmaker()
+
+async def get_read_db(sessionmaker: async_sessionmaker = Depends(get_read_db_sessionmaker)):
+    """Session for read-only endpoints, see get_read_db_sessionmaker."""
+    async with sessionmaker() as session:
+        yield session
+
+# Full User row, for endpoints that return or modify profile fields
+async def get_current_user_row(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> User:
+    user = await db.get(User, current_user.id)
     if user is None:
-        raise credentials_exception
+        raise http_401()
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if current_user.status != UserStatus.ACTIVE:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -41,24 +77,41 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         )
     return current_user
 
+async def get_live_user(
+    court_id: uuid.UUID,
+    token: str | None = Query(None, description="Token from POST /courts/{court_id}/live/token, for EventSource"),
+    bearer: str | None = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> CurrentUser:
+    """Active user of a live stream, authenticated by a live token for this court or the usual Bearer header."""
+    if token:
+        claims = _token_claims(token, LIVE_TOKEN_SCOPE)
+        if claims.get("court_id") != str(court_id):
+            raise http_401()
+    elif bearer:
+        claims = _token_claims(bearer)
+    else:
+        raise http_401()
+    return await get_current_active_user(await _user_for(claims["sub"], db))
+
 def require_roles(*allowed: UserRole):
-    async def _checker(current_user: User = Depends(get_current_user)) -> User:
+    async def _checker(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
         if current_user.role not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions.")
         return current_user
     return _checker
 
 def require_active_and_roles(*allowed: UserRole):
-    async def _checker(current_user: User = Depends(get_current_active_user)) -> User:
+    async def _checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
         if current_user.role not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions.")
         return current_user
     return _checker
 
-def is_admin_like(user: User) -> bool:
+def is_admin_like(user: CurrentUser) -> bool:
     return user.role in {UserRole.SUPERUSER, UserRole.SINDICO_GERAL}
 
-def assert_same_tower_or_admin(actor: User, target_tower_id):
+def assert_same_tower_or_admin(actor: CurrentUser, target_tower_id):
     if is_admin_like(actor):
         return
     if actor.tower_id is None or actor.tower_id != target_tower_id:
@@ -0,0 +1,34 @@
+from fastapi import Response
+from pydantic import BaseModel
+
+# Opt-in (FAST_LIST_SERIALIZATION) path for large list responses: the query
+# selects only the response model's columns as tuples and the page is encoded
+# with orjson straight from them, skipping ORM instances, the identity map and
+# response-model validation. The JSON is the same the response model produces
+# (scripts/bench_list_serialization.py checks it).
+
+def model_fields(schema: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+def model_columns(schema: type[BaseModel], entity, prefix: str = "") -> list:
+    """Columns of entity named like the schema's fields, in field order."""
+    return [getattr(entity, name).label(prefix + name) for name in schema.model_fields]
+
+def _default(value):
+    # asyncpg hands back its own UUID type, which orjson does not know
+    return str(value)
+
+def dump_rows(rows, fields: tuple[str, ...], nested: tuple[str, tuple[str, ...]] | None = None) -> bytes:
+    """Encode tuple rows as a JSON array of objects; nested=(key, fields) takes the trailing columns as a sub-object."""
+    # Only needed with FAST_LIST_SERIALIZATION, keep it out of cold-start imports
+    import orjson
+    if nested is None:
+        return orjson.dumps([dict(zip(fields, row)) for row in rows], default=_default)
+    key, nested_fields = nested
+    n = len(fields)
+    return orjson.dumps([{**dict(zip(fields, row[:n])), key: dict(zip(nested_fields, row[n:]))} for row in rows], default=_default)
+
+def rows_response(body: bytes | str, response: Response) -> Response:
+    # A returned Response bypasses the injected one, so carry over the headers set on it (ETag, next cursor)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,125 @@
+import asyncio
+import re
+import time
+from jose import JWTError, jwt
+from config import settings
+
+# Google sign-in without the userinfo round-trip: the code is exchanged for
+# tokens over one application-wide keep-alive client, and the id_token is
+# verified locally against Google's signing keys (cached for the max-age Google
+# sends, JWKS_DEFAULT_TTL_SECONDS otherwise). Endpoints come from settings so a
+# local fake can stand in for Google.
+
+JWKS_DEFAULT_TTL_SECONDS = 3600
+# An unknown kid forces a refetch (key rotation), but at most this often
+JWKS_MIN_REFRESH_SECONDS = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+class GoogleAuthError(Exception):
+    status_code = 400
+
+class GoogleUnavailableError(GoogleAuthError):
+    status_code = 502
+
+_client = None
+
+def get_http_client():
+    """Application-lifetime HTTP client; connections to Google are reused across logins."""
+    global _client
+    if _client is None:
+        # httpx is only needed on login, keep it out of cold-start imports
+        import httpx
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+class JwksCache:
+    def __init__(self, url: str, default_ttl: float = JWKS_DEFAULT_TTL_SECONDS, min_refresh: float = JWKS_MIN_REFRESH_SECONDS):
+        self.url = url
+        self.default_ttl = default_ttl
+        self.min_refresh = min_refresh
+        self._keys: dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def get(self, kid: str) -> dict:
+        if time.monotonic() >= self._expires_at or (
+            kid not in self._keys and time.monotonic() - self._fetched_at >= self.min_refresh
+        ):
+            async with self._lock:
+                # Another login may have refreshed while we waited
+                if time.monotonic() >= self._expires_at or (
+                    kid not in self._keys and time.monotonic() - self._fetched_at >= self.min_refresh
+                ):
+                    await self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise GoogleAuthError(f"Unknown signing key {kid!r}")
+        return key
+
+    async def _refresh(self):
+        import httpx
+        try:
+            res = await get_http_client().get(self.url)
+            res.raise_for_status()
+        except httpx.HTTPError as e:
+            raise GoogleUnavailableError("Could not fetch Google signing keys") from e
+        self._keys = {key["kid"]: key for key in res.json().get("keys", [])}
+        match = _MAX_AGE_RE.search(res.headers.get("cache-control", ""))
+        ttl = int(match.group(1)) if match else self.default_ttl
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + ttl
+
+_jwks: JwksCache | None = None
+
+def get_jwks() -> JwksCache:
+    global _jwks
+    if _jwks is None or _jwks.url != settings.GOOGLE_JWKS_URL:
+        _jwks = JwksCache(settings.GOOGLE_JWKS_URL)
+    return _jwks
+
+async def exchange_code(code: str) -> dict:
+    import httpx
+    try:
+        res = await get_http_client().post(settings.GOOGLE_TOKEN_URL, data={
+            "code": code,
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "redirect_uri": settings.OAUTH_REDIRECT_URI,
+            "grant_type": "authorization_code",
+        })
+        token_data = res.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise GoogleUnavailableError("Could not reach Google") from e
+    if "id_token" not in token_data:
+        raise GoogleAuthError("Invalid code or google error")
+    return token_data
+
+async def verify_id_token(id_token: str, access_token: str | None = None) -> dict:
+    """Check signature, audience, issuer and expiry of a Google id_token and return its claims."""
+    try:
+        header = jwt.get_unverified_header(id_token)
+    except JWTError as e:
+        raise GoogleAuthError("Malformed id_token") from e
+    key = await get_jwks().get(header.get("kid", ""))
+    try:
+        return jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_ID,
+            issuer=[iss.strip() for iss in settings.GOOGLE_ISSUERS.split(",")],
+            access_token=access_token,
+        )
+    except JWTError as e:
+        raise GoogleAuthError(f"Invalid id_token: {e}") from e
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "court:"
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+
+class LiveBroker:
+    """Fans slot changes out to the live streams open in this process.
+
+    With REDIS_URL set, events are published on a per-court channel and one
+    pattern subscription per process delivers them to the local streams, so
+    every worker and instance sees every change. Without Redis, events are
+    delivered in-process only.
+    """
+
+    def __init__(self, redis_url: str | None):
+        self.redis_url = redis_url
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._redis = None
+        self._listener: asyncio.Task | None = None
+
+    def _client(self):
+        if self._redis is None:
+            # Imported on first use to keep redis out of cold start
+            from redis import asyncio as aioredis
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    @asynccontextmanager
+    async def subscribe(self, court_id: uuid.UUID):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        key = str(court_id)
+        self._subscribers[key].add(queue)
+        if self.redis_url and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            yield queue
+        finally:
+            self._subscribers[key].discard(queue)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+
+    async def publish(self, court_id: uuid.UUID, event: dict):
+        message = json.dumps(event, default=str)
+        if not self.redis_url:
+            self._dispatch(str(court_id), message)
+            return
+        try:
+            await self._client().publish(f"{CHANNEL_PREFIX}{court_id}", message)
+        except Exception:
+            # Live updates are best effort; the write itself already committed
+            logger.warning("live publish failed for court %s", court_id, exc_info=True)
+
+    def _dispatch(self, court_id: str, message: str):
+        for queue in self._subscribers.get(court_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(json.dumps({"type": "resync", "court_id": court_id}))
+
+    async def _listen(self):
+        delay = 0.5
+        while True:
+            try:
+                pubsub = self._client().pubsub()
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"].decode()
+                    self._dispatch(channel[len(CHANNEL_PREFIX):], message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("live subscription lost, reconnecting in %.1fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+broker = LiveBroker(settings.REDIS_URL)
+
+async def publish_slot_change(court_id: uuid.UUID, change: str, reservation_id: uuid.UUID, start_time: datetime, end_time: datetime):
+    """Announce a committed slot change ("reserved" or "released") to live streams of the court."""
+    await broker.publish(court_id, {
+        "type": change,
+        "court_id": court_id,
+        "reservation_id": reservation_id,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+    })
+
+async def sse_events(court_id: uuid.UUID):
+    yield f"retry: 3000\n: subscribed to court {court_id}\n\n"
+    async with broker.subscribe(court_id) as queue:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            event_type = json.loads(message)["type"]
+            yield f"event: {event_type}\ndata: {message}\n\n"
@@ -1,7 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from routers import auth, users, approvals, reservations, admin
+from routers import auth, users, approvals, reservations, admin, courts, blackouts
+from database import get_read_engine, warm_pool, pool_status
+from config import settings
+from pagination import NEXT_CURSOR_HEADER
+from live import broker
+from audit import audit_log
+from blackouts import blackout_index
+from google_auth import close_http_client
+from replica import recent_writers
 
 app = FastAPI(
     title="Quadra Token API",
@@ -19,6 +27,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(auth.router, prefix="/api/v1")
@@ -26,12 +35,34 @@ app.include_router(users.router, prefix="/api/v1")
 app.include_router(approvals.router, prefix="/api/v1")
 app.include_router(reservations.router, prefix="/api/v1")
 app.include_router(admin.router, prefix="/api/v1")
+app.include_router(courts.router, prefix="/api/v1")
+app.include_router(blackouts.router, prefix="/api/v1")
+
+@app.on_event("startup")
+async def startup():
+    await warm_pool()
+    if get_read_engine() is not None:
+        await warm_pool(get_read_engine())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await broker.close()
+    await audit_log.close()
+    await blackout_index.close()
+    await close_http_client()
+    await recent_writers.close()
 
 @app.get("/healthz")
 async def health_check():
     return {"status": "ok", "version": "1.0.0"}
 
-@app.get("/metrics")
-async def metrics():
-    # TODO: Implement Prometheus metrics
-    return {"status": "metrics_placeholder"}
+@app.get("/healthz/pool")
+async def pool_health():
+    status = pool_status()
+    if get_read_engine() is not None:
+        status["read"] = pool_status(get_read_engine())
+    return status
+
+if settings.PROMETHEUS_ENABLED:
+    from metrics import setup_metrics
+    setup_metrics(app)
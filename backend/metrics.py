@@ -0,0 +1,170 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import FastAPI, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from database import get_read_engine, pool_status
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served",
+    ["method", "route"], multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "SQL statements executed per request",
+    ["route"], buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request",
+    ["route"], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_QUERY_SECONDS = Counter("db_query_seconds_total", "Time spent executing SQL")
+
+# pool="primary" or "read" (the replica's engine, with DATABASE_READ_URL)
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"], multiprocess_mode="liveall")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"], multiprocess_mode="liveall")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"], multiprocess_mode="liveall")
+POOL_CHECKOUTS = Gauge("db_pool_checkouts", "Connection checkouts since start", ["pool"], multiprocess_mode="liveall")
+POOL_CHECKOUT_WAIT_MAX = Gauge("db_pool_checkout_wait_max_seconds", "Longest checkout wait since start", ["pool"], multiprocess_mode="liveall")
+POOL_CHECKOUT_WAIT_AVG = Gauge("db_pool_checkout_wait_avg_seconds", "Average checkout wait since start", ["pool"], multiprocess_mode="liveall")
+
+BOOKINGS = Counter("reservation_bookings_total", "Booking attempts by outcome", ["outcome"])
+
+OUTBOX_PENDING = Gauge("outbox_pending_events", "Reservation events not yet dispatched", multiprocess_mode="max")
+OUTBOX_LAG = Gauge("outbox_lag_seconds", "Age of the oldest undispatched reservation event", multiprocess_mode="max")
+OUTBOX_DISPATCHED = Counter("outbox_dispatched_total", "Reservation events dispatched to sinks")
+
+class RequestDbStats:
+    def __init__(self, parent: "RequestDbStats | None" = None, record_statements: bool = False):
+        self.queries = 0
+        self.seconds = 0.0
+        # Statements also count towards the enclosing scope (a test around a request)
+        self.parent = parent
+        self.statements: list[str] | None = [] if record_statements else None
+
+_request_db_stats: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+def current_request_db_stats() -> RequestDbStats | None:
+    return _request_db_stats.get()
+
+def track_db_stats() -> RequestDbStats:
+    # Start accounting SQL for the current task (a request, a script, a test)
+    stats = RequestDbStats()
+    _request_db_stats.set(stats)
+    return stats
+
+@contextmanager
+def db_stats_scope(record_statements: bool = False):
+    """Account SQL executed inside the block, nested in any scope already open."""
+    stats = RequestDbStats(_request_db_stats.get(), record_statements)
+    token = _request_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_db_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(elapsed)
+    stats = _request_db_stats.get()
+    while stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+        stats = stats.parent
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def _route_template(app, scope) -> str:
+    # Label by path template, never the raw path, to keep label cardinality bounded
+    for route in app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(child_scope.get("route", route), "path", "unmatched")
+    return "unmatched"
+
+class PrometheusMiddleware:
+    def __init__(self, app, fastapi_app: FastAPI):
+        self.app = app
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(self.fastapi_app, scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            with db_stats_scope() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+
+def _update_pool_gauges():
+    pools = {"primary": pool_status()}
+    if get_read_engine() is not None:
+        pools["read"] = pool_status(get_read_engine())
+    for name, status in pools.items():
+        POOL_CHECKOUTS.labels(name).set(status["checkouts"])
+        POOL_CHECKOUT_WAIT_MAX.labels(name).set(status["checkout_wait_max_ms"] / 1000)
+        POOL_CHECKOUT_WAIT_AVG.labels(name).set(status["checkout_wait_avg_ms"] / 1000)
+        if "size" in status:
+            POOL_SIZE.labels(name).set(status["size"])
+            POOL_CHECKED_OUT.labels(name).set(status["checked_out"])
+            POOL_OVERFLOW.labels(name).set(max(status["overflow"], 0))
+
+async def metrics_endpoint():
+    _update_pool_gauges()
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Several uvicorn workers: aggregate the per-process files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+def instrument_engine():
+    # Idempotent; scripts without the Prometheus middleware call it to get db stats
+    if event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+def setup_metrics(app: FastAPI):
+    app.add_middleware(PrometheusMiddleware, fastapi_app=app)
+    instrument_engine()
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
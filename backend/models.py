@@ -1,9 +1,9 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, Boolean, Date, DateTime, BigInteger, ForeignKey, Integer, JSON, Computed, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSRANGE, Range, ExcludeConstraint
 from database import Base
 
 # Enums
@@ -83,8 +83,25 @@ class Court(Base):
     name: Mapped[str] = mapped_column(String)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
+# Name of the GiST exclusion constraint that rejects overlapping active reservations
+RESERVATION_OVERLAP_CONSTRAINT = "reservations_no_overlap"
+
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        ExcludeConstraint(
+            ("court_id", "="),
+            ("period", "&&"),
+            name=RESERVATION_OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("status <> 'cancelled'"),
+        ),
+        # Keyset pagination on (start_time, id) for listings and per-user history
+        Index("ix_reservations_start_time_id", "start_time", "id"),
+        Index("ix_reservations_user_id_start_time_id", "user_id", "start_time", "id"),
+        # Due-time scans (reminders) over active reservations
+        Index("ix_reservations_status_start_time", "status", "start_time"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     court_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("courts.id"))
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
@@ -95,12 +112,30 @@ class Reservation(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     cancelled_by: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     notes: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Half-open [start_time, end_time) range maintained by Postgres, used by the exclusion constraint
+    period: Mapped[Range[datetime] | None] = mapped_column(TSRANGE, Computed("tsrange(start_time, end_time, '[)')", persisted=True))
 
     user = relationship("User", foreign_keys=[user_id], back_populates="reservations")
     created_by = relationship("User", foreign_keys=[created_by_user_id])
     cancelled_by_user = relationship("User", foreign_keys=[cancelled_by])
     events = relationship("ReservationEvent", back_populates="reservation", cascade="all, delete")
 
+class CourtDayVersion(Base):
+    # Bumped in the same transaction as every reservation change on (court, day); backs listing ETags
+    __tablename__ = "court_day_versions"
+    court_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("courts.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, default=1)
+
+class UserDailyUsage(Base):
+    # Seconds booked per user and period, charged and released with the reservation.
+    # period is "D", "W" or "M" and day is the period start (day, Monday, 1st of the month)
+    __tablename__ = "user_daily_usage"
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    period: Mapped[str] = mapped_column(String(1), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    seconds: Mapped[int] = mapped_column(Integer, default=0)
+
 class BlackoutWindow(Base):
     __tablename__ = "blackout_windows"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -111,11 +146,19 @@ class BlackoutWindow(Base):
 
 class ReservationEvent(Base):
     __tablename__ = "reservation_events"
+    __table_args__ = (
+        # At most one reminder per reservation, whatever the number of scheduler replicas
+        Index("uq_reservation_events_reminder", "reservation_id", unique=True, postgresql_where=text("type = 'reminder'")),
+        # Outbox scan: unsent events in creation order
+        Index("ix_reservation_events_unsent", "created_at", postgresql_where=text("sent_at IS NULL")),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reservation_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("reservations.id"))
     type: Mapped[EventType] = mapped_column(String)
     payload: Mapped[dict] = mapped_column(JSONB, default={})
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Set by the outbox dispatcher once the event reached its sinks
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     reservation = relationship("Reservation", back_populates="events")
 
@@ -127,9 +170,13 @@ class SignupApprovalStatus(str, Enum):
 
 class SignupApprovalRequest(Base):
     __tablename__ = "signup_approval_requests"
+    __table_args__ = (
+        # Per-tower pending queue in keyset order; also serves plain tower_id lookups
+        Index("ix_signup_approval_requests_tower_status_created", "tower_id", "status", "created_at"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     applicant_user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), index=True)
-    tower_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("towers.id"), index=True)
+    tower_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("towers.id"))
     unit_number: Mapped[str] = mapped_column(String)
     status: Mapped[SignupApprovalStatus] = mapped_column(String, default=SignupApprovalStatus.PENDING, index=True)
     approved_by_user_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"), nullable=True)
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import Protocol
+from config import settings
+from models import EventType
+
+logger = logging.getLogger(__name__)
+
+# Reservation events flow outbox -> RQ -> worker -> SMS provider. The outbox
+# dispatcher enqueues committed events, reminders included; the worker looks
+# the reservation up, parks the message in a per-recipient list and schedules
+# one flush per recipient and batch window, so bursts collapse into a single
+# SMS.
+
+NOTIFY_QUEUE = "notifications"
+RETRY_INTERVALS = [10, 30, 60, 120, 300]
+
+_PENDING_KEY = "notify:pending:{}"
+_FLUSH_SCHEDULED_KEY = "notify:flush:{}"
+_FLUSH_LOCK_KEY = "notify:lock:{}"
+_SEEN_KEY = "notify:seen:{}:{}"
+_BUCKET_KEY = "notify:bucket"
+SEEN_TTL_SECONDS = 7 * 24 * 3600
+
+MESSAGES = {
+    EventType.CREATED: "Reserva registrada: {court} em {when}.",
+    EventType.CONFIRMED: "Reserva confirmada: {court} em {when}.",
+    EventType.CANCELLED: "Reserva cancelada: {court} em {when}.",
+    EventType.REMINDER: "Lembrete: sua reserva na {court} começa em {when}.",
+}
+
+@dataclass(frozen=True)
+class Notification:
+    recipient: str
+    reservation_id: str
+    event: str
+    text: str
+
+def collapse(notifications: list[Notification]) -> list[Notification]:
+    """Keep only the latest event per reservation, in arrival order."""
+    latest = {n.reservation_id: n for n in notifications}
+    return [n for n in notifications if latest[n.reservation_id] is n]
+
+def compose_sms(notifications: list[Notification]) -> str:
+    return "\n".join(n.text for n in notifications)
+
+# --- Transports -----------------------------------------------------------
+
+class SmsTransport(Protocol):
+    def send(self, to: str, body: str) -> None: ...
+
+class TwilioTransport:
+    def __init__(self, account_sid: str, auth_token: str, from_number: str):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+
+    def send(self, to: str, body: str) -> None:
+        import httpx
+        r = httpx.post(
+            f"https://api.twilio.com/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+            data={"From": self.from_number, "To": to, "Body": body},
+            auth=(self.account_sid, self.auth_token),
+            timeout=10,
+        )
+        # 429 and 5xx surface as exceptions and go through the job retries
+        r.raise_for_status()
+
+class LogTransport:
+    def send(self, to: str, body: str) -> None:
+        logger.info("SMS to %s: %s", to, body)
+
+class FakeTransport:
+    """Records messages instead of sending them; can fail the next N sends."""
+
+    def __init__(self, fail_next: int = 0):
+        self.sent: list[tuple[str, str]] = []
+        self.fail_next = fail_next
+
+    def send(self, to: str, body: str) -> None:
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise RuntimeError("fake transport failure")
+        self.sent.append((to, body))
+
+_transport: SmsTransport | None = None
+
+def get_transport() -> SmsTransport:
+    global _transport
+    if _transport is None:
+        kind = settings.NOTIFY_TRANSPORT or ("twilio" if settings.TWILIO_ACCOUNT_SID else "log")
+        if kind == "twilio":
+            _transport = TwilioTransport(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_FROM)
+        elif kind == "fake":
+            _transport = FakeTransport()
+        else:
+            _transport = LogTransport()
+    return _transport
+
+def set_transport(transport: SmsTransport | None):
+    global _transport
+    _transport = transport
+
+# --- Redis plumbing -------------------------------------------------------
+
+_redis = None
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        # Imported on first use to keep redis out of the API cold start
+        from redis import Redis
+        _redis = Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+def set_redis(connection):
+    global _redis
+    _redis = connection
+
+def get_queue():
+    from rq import Queue
+    return Queue(NOTIFY_QUEUE, connection=get_redis())
+
+def _retry():
+    from rq import Retry
+    return Retry(max=len(RETRY_INTERVALS), interval=RETRY_INTERVALS)
+
+# Refill-on-read token bucket shared by all workers; returns the seconds to
+# wait before a token is available (0 when one was taken)
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+class TokenBucket:
+    def __init__(self, connection, key: str, rate_per_second: float, capacity: int):
+        self.connection = connection
+        self.key = key
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._script = connection.register_script(_TOKEN_BUCKET_LUA)
+
+    def take(self) -> float:
+        return float(self._script(keys=[self.key], args=[self.rate_per_second, self.capacity, time.time()]))
+
+# --- API side -------------------------------------------------------------
+
+def enqueue_reservation_events(event: EventType, reservation_ids: list[uuid.UUID]):
+    """Queue notification jobs; called by the outbox dispatcher, never from a request."""
+    if not settings.REDIS_URL:
+        return
+    try:
+        queue = get_queue()
+        for reservation_id in reservation_ids:
+            queue.enqueue(record_reservation_event, event.value, str(reservation_id), retry=_retry())
+    except Exception:
+        logger.warning("could not enqueue %s notifications", event.value, exc_info=True)
+
+# --- Worker jobs ----------------------------------------------------------
+
+async def _load_reservation(reservation_id: str):
+    from sqlalchemy import select
+    from database import get_sessionmaker
+    from models import Court, Reservation, User
+    async with get_sessionmaker()() as session:
+        res = await session.execute(
+            select(User.phone, Court.name, Reservation.start_time)
+            .join(User, User.id == Reservation.user_id)
+            .join(Court, Court.id == Reservation.court_id)
+            .where(Reservation.id == uuid.UUID(reservation_id))
+        )
+        return res.first()
+
+def record_reservation_event(event: str, reservation_id: str):
+    """Job: turn a reservation event into a pending message for its recipient."""
+    redis = get_redis()
+    row = asyncio.run(_load_reservation(reservation_id))
+    if row is None or not row.phone:
+        return
+    # Each (event, reservation) is announced once, even if the job is retried or enqueued twice
+    if not redis.set(_SEEN_KEY.format(event, reservation_id), 1, nx=True, ex=SEEN_TTL_SECONDS):
+        return
+    phone, court_name, start_time = row
+    text = MESSAGES[EventType(event)].format(court=court_name, when=start_time.strftime("%d/%m %H:%M"))
+    notification = Notification(recipient=phone, reservation_id=reservation_id, event=event, text=text)
+    redis.rpush(_PENDING_KEY.format(phone), json.dumps(asdict(notification)))
+    _schedule_flush(phone, settings.NOTIFY_BATCH_WINDOW_SECONDS)
+
+def _schedule_flush(phone: str, delay_seconds: float):
+    # One scheduled flush per recipient at a time; later events ride along with it
+    if get_redis().set(_FLUSH_SCHEDULED_KEY.format(phone), 1, nx=True, ex=int(delay_seconds) + 300):
+        get_queue().enqueue_in(timedelta(seconds=delay_seconds), flush_recipient, phone, retry=_retry())
+
+def flush_recipient(phone: str):
+    """Job: send everything pending for one recipient as a single rate-limited SMS."""
+    redis = get_redis()
+    lock_key = _FLUSH_LOCK_KEY.format(phone)
+    if not redis.set(lock_key, 1, nx=True, ex=60):
+        redis.delete(_FLUSH_SCHEDULED_KEY.format(phone))
+        _schedule_flush(phone, 5)
+        return
+    try:
+        redis.delete(_FLUSH_SCHEDULED_KEY.format(phone))
+        pending_key = _PENDING_KEY.format(phone)
+        raw = redis.lrange(pending_key, 0, -1)
+        if not raw:
+            return
+        wait = TokenBucket(redis, _BUCKET_KEY, settings.NOTIFY_RATE_PER_SECOND, settings.NOTIFY_BURST).take()
+        if wait > 0:
+            _schedule_flush(phone, wait)
+            return
+        notifications = collapse([Notification(**json.loads(item)) for item in raw])
+        get_transport().send(phone, compose_sms(notifications))
+        # Only drop what was sent; events that arrived meanwhile stay for the next flush
+        redis.ltrim(pending_key, len(raw), -1)
+    finally:
+        redis.delete(lock_key)
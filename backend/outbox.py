@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Protocol
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from models import EventType
+
+logger = logging.getLogger(__name__)
+
+# reservation_events doubles as a transactional outbox: booking and cancel
+# write the event in the same transaction as the change, and this dispatcher
+# delivers unsent rows at least once (consumers dedupe by event id). Replicas
+# split the backlog through SKIP LOCKED; order is by created_at within a batch.
+
+OUTBOX_STREAM = "reservation-events"
+STREAM_MAXLEN = 100_000
+
+_CLAIM_SQL = text("""
+SELECT id, reservation_id, type, payload, created_at
+FROM reservation_events
+WHERE sent_at IS NULL
+ORDER BY created_at
+LIMIT :batch_size
+FOR UPDATE SKIP LOCKED
+""")
+
+_MARK_SENT_SQL = text("UPDATE reservation_events SET sent_at = :now WHERE id = ANY(CAST(:ids AS uuid[]))")
+
+_BACKLOG_SQL = text("SELECT count(*), min(created_at) FROM reservation_events WHERE sent_at IS NULL")
+
+class OutboxSink(Protocol):
+    async def publish(self, events: list[dict]) -> None: ...
+
+class RedisStreamSink:
+    def __init__(self, url: str, stream: str = OUTBOX_STREAM):
+        from redis import asyncio as aioredis
+        self.client = aioredis.from_url(url)
+        self.stream = stream
+
+    async def publish(self, events: list[dict]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {
+                    "id": event["id"],
+                    "reservation_id": event["reservation_id"],
+                    "type": event["type"],
+                    "payload": json.dumps(event["payload"]),
+                    "created_at": event["created_at"],
+                }, maxlen=STREAM_MAXLEN, approximate=True)
+            await pipe.execute()
+
+class NotificationSink:
+    """Feeds the SMS worker; it already ignores events it has seen.
+
+    The only way booking and cancel events reach notifications, so an SMS is
+    sent only for changes that committed.
+    """
+
+    async def publish(self, events: list[dict]) -> None:
+        from notifications import MESSAGES, enqueue_reservation_events
+        by_type: dict[str, list[str]] = {}
+        for event in events:
+            by_type.setdefault(event["type"], []).append(event["reservation_id"])
+        for event_type, reservation_ids in by_type.items():
+            if EventType(event_type) in MESSAGES:
+                await asyncio.to_thread(enqueue_reservation_events, EventType(event_type), reservation_ids)
+
+class LogSink:
+    async def publish(self, events: list[dict]) -> None:
+        for event in events:
+            logger.info("reservation event %s %s %s", event["type"], event["reservation_id"], event["payload"])
+
+class MemorySink:
+    def __init__(self):
+        self.events: list[dict] = []
+
+    async def publish(self, events: list[dict]) -> None:
+        self.events.extend(events)
+
+def build_sinks(names: str | None = None) -> list[OutboxSink]:
+    names = names or settings.OUTBOX_SINKS or ("redis_stream,notifications" if settings.REDIS_URL else "log")
+    sinks = []
+    for name in (n.strip() for n in names.split(",") if n.strip()):
+        if name == "redis_stream":
+            sinks.append(RedisStreamSink(settings.REDIS_URL))
+        elif name == "notifications":
+            sinks.append(NotificationSink())
+        elif name == "log":
+            sinks.append(LogSink())
+        else:
+            raise ValueError(f"Unknown outbox sink: {name}")
+    return sinks
+
+async def dispatch_batch(db: AsyncSession, sinks: list[OutboxSink], batch_size: int | None = None) -> int:
+    """Deliver one batch of unsent events and mark them sent. Returns how many were sent."""
+    rows = (await db.execute(_CLAIM_SQL, {"batch_size": batch_size or settings.OUTBOX_BATCH_SIZE})).mappings().all()
+    if not rows:
+        await db.rollback()
+        return 0
+    events = [
+        {
+            "id": str(row["id"]),
+            "reservation_id": str(row["reservation_id"]),
+            "type": row["type"],
+            "payload": row["payload"],
+            "created_at": row["created_at"].isoformat(),
+        }
+        for row in rows
+    ]
+    # A sink failure rolls back and leaves the rows for the next attempt
+    for sink in sinks:
+        await sink.publish(events)
+    await db.execute(_MARK_SENT_SQL, {"now": datetime.utcnow(), "ids": [row["id"] for row in rows]})
+    await db.commit()
+    return len(rows)
+
+async def backlog(db: AsyncSession) -> tuple[int, float]:
+    """Unsent events and the age in seconds of the oldest one."""
+    count, oldest = (await db.execute(_BACKLOG_SQL)).one()
+    return count, (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+async def run_forever():
+    from database import get_sessionmaker
+    from metrics import OUTBOX_DISPATCHED, OUTBOX_LAG, OUTBOX_PENDING
+    sinks = build_sinks()
+    while True:
+        sent = 0
+        try:
+            async with get_sessionmaker()() as db:
+                sent = await dispatch_batch(db, sinks)
+                pending, lag = await backlog(db)
+            OUTBOX_DISPATCHED.inc(sent)
+            OUTBOX_PENDING.set(pending)
+            OUTBOX_LAG.set(lag)
+        except Exception:
+            logger.exception("outbox dispatch failed")
+        # Keep draining while batches come back full
+        if sent < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+
+# Usage: python outbox.py (any number of replicas)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if settings.OUTBOX_METRICS_PORT:
+        from prometheus_client import start_http_server
+        start_http_server(settings.OUTBOX_METRICS_PORT)
+    asyncio.run(run_forever())
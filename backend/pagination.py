@@ -0,0 +1,73 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Callable, Mapping
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from database import get_sessionmaker
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(sort_value: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_value, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(sort_value), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_keyset(q: Select, sort_col, id_col, cursor: str | None, descending: bool = False) -> Select:
+    """Order by (sort_col, id_col) and, when a cursor is given, start right after it."""
+    if cursor:
+        key = tuple_(sort_col, id_col)
+        after = decode_cursor(cursor)
+        q = q.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    if descending:
+        return q.order_by(sort_col.desc(), id_col.desc())
+    return q.order_by(sort_col.asc(), id_col.asc())
+
+async def fetch_page(db: AsyncSession, q: Select, limit: int, key: Callable, tuples: bool = False) -> tuple[list, str | None]:
+    # One extra row tells whether there is a next page without a COUNT
+    res = await db.execute(q.limit(limit + 1))
+    rows = list(res.all() if tuples else res.scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+def ndjson_response(
+    q: Select,
+    schema: type[BaseModel],
+    limit: int | None = None,
+    headers: Mapping[str, str] | None = None,
+    sessionmaker: async_sessionmaker | None = None,
+) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON through a server-side cursor.
+
+    Uses its own session so the cursor stays open for the whole response body,
+    from sessionmaker (the primary by default; read-only endpoints pass the one
+    get_read_db_sessionmaker chose). headers are those set on the injected
+    Response (ETag), which a returned response bypasses.
+    """
+    if limit is not None:
+        q = q.limit(limit)
+    sessionmaker = sessionmaker or get_sessionmaker()
+
+    async def rows():
+        async with sessionmaker() as session:
+            result = await session.stream_scalars(q.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for row in result:
+                yield schema.model_validate(row).model_dump_json() + "\n"
+
+    headers = {k: v for k, v in (headers or {}).items() if k != "content-length"}
+    return StreamingResponse(rows(), media_type="application/x-ndjson", headers=headers)
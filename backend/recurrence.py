@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from schemas import RecurrenceFrequency, RecurrenceRule
+
+def expand_recurrence(start_time: datetime, end_time: datetime, rule: RecurrenceRule, max_occurrences: int) -> list[tuple[datetime, datetime]]:
+    """Expand an RRULE-style rule (DAILY/WEEKLY, INTERVAL, COUNT/UNTIL, BYDAY) into (start, end) pairs.
+
+    The first occurrence is start_time itself when it matches the rule.
+    Raises ValueError when the rule is unbounded or yields more than max_occurrences.
+    """
+    if rule.count is None and rule.until is None:
+        raise ValueError("Recurrence needs count or until")
+    duration = end_time - start_time
+    limit = rule.count if rule.count is not None else max_occurrences + 1
+
+    if rule.freq == RecurrenceFrequency.DAILY:
+        candidates = (start_time + timedelta(days=rule.interval * i) for i in range(limit))
+    else:
+        weekdays = sorted(set(rule.by_weekday or [start_time.weekday()]))
+        week_start = start_time - timedelta(days=start_time.weekday())
+
+        def weekly():
+            week = 0
+            while True:
+                base = week_start + timedelta(weeks=rule.interval * week)
+                for wd in weekdays:
+                    candidate = base + timedelta(days=wd)
+                    if candidate >= start_time:
+                        yield candidate
+                week += 1
+
+        candidates = weekly()
+
+    out = []
+    for occurrence in candidates:
+        if rule.until is not None and occurrence > rule.until:
+            break
+        if len(out) == limit:
+            break
+        out.append((occurrence, occurrence + duration))
+        if len(out) > max_occurrences:
+            raise ValueError(f"Recurrence yields more than {max_occurrences} occurrences")
+    return out
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Claims confirmed reservations starting within the lead window through
+# ix_reservations_status_start_time and records their REMINDER event. SKIP
+# LOCKED lets replicas split the due rows instead of waiting on each other, and
+# the partial unique index on reminder events makes a second claim a no-op.
+# The outbox dispatcher delivers the events to the SMS worker like any other.
+_CLAIM_SQL = text("""
+WITH due AS (
+    SELECT r.id, r.court_id, r.user_id, r.start_time, r.end_time
+    FROM reservations r
+    WHERE r.status = 'confirmed'
+      AND r.start_time >= :now AND r.start_time < :horizon
+      AND NOT EXISTS (
+          SELECT 1 FROM reservation_events e WHERE e.reservation_id = r.id AND e.type = 'reminder'
+      )
+    ORDER BY r.start_time
+    LIMIT :batch_size
+    FOR UPDATE OF r SKIP LOCKED
+)
+INSERT INTO reservation_events (id, reservation_id, type, payload, created_at)
+SELECT gen_random_uuid(), due.id, 'reminder',
+       jsonb_build_object('court_id', due.court_id, 'user_id', due.user_id,
+                          'start_time', due.start_time, 'end_time', due.end_time),
+       :now
+FROM due
+ON CONFLICT (reservation_id) WHERE type = 'reminder' DO NOTHING
+RETURNING reservation_id
+""")
+
+async def claim_due_reminders(db: AsyncSession, now: datetime | None = None, lead: timedelta | None = None, batch_size: int | None = None) -> list[uuid.UUID]:
+    """Record REMINDER events for reservations due soon and return their ids. The caller commits."""
+    now = now or datetime.utcnow()
+    lead = lead or timedelta(minutes=settings.REMINDER_LEAD_MINUTES)
+    res = await db.execute(_CLAIM_SQL, {
+        "now": now,
+        "horizon": now + lead,
+        "batch_size": batch_size or settings.REMINDER_BATCH_SIZE,
+    })
+    return list(res.scalars().all())
+
+async def run_once() -> int:
+    from database import get_sessionmaker
+    claimed = 0
+    while True:
+        async with get_sessionmaker()() as db:
+            ids = await claim_due_reminders(db)
+            await db.commit()
+        claimed += len(ids)
+        # A full batch means more may be due right now
+        if len(ids) < settings.REMINDER_BATCH_SIZE:
+            return claimed
+
+async def run_forever():
+    while True:
+        try:
+            claimed = await run_once()
+            if claimed:
+                logger.info("recorded %d reminders", claimed)
+        except Exception:
+            logger.exception("reminder scan failed")
+        await asyncio.sleep(settings.REMINDER_POLL_SECONDS)
+
+# Usage: python reminders.py (any number of replicas)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_forever())
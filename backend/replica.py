@@ -0,0 +1,72 @@
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Unsafe methods: the request may write, so the user's next reads must see it
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+class RecentWriters:
+    """Users who sent a write within the last window_seconds.
+
+    Their reads stay on the primary until the replica has caught up with what
+    they wrote (read-your-writes); everyone else reads from the replica. Marks
+    are kept per process and, with REDIS_URL set, in Redis so the worker that
+    serves the next read knows too. A Redis error counts as a recent write:
+    the read goes to the primary, which is never stale.
+    """
+
+    def __init__(self, redis_url: str | None, window_seconds: float, max_entries: int = 10000):
+        self.redis_url = redis_url
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._until: OrderedDict[uuid.UUID, float] = OrderedDict()
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            # Imported on first use to keep redis out of cold start
+            from redis import asyncio as aioredis
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"wrote:{user_id}"
+
+    async def mark(self, user_id: uuid.UUID):
+        if self.window_seconds <= 0:
+            return
+        self._until.pop(user_id, None)
+        self._until[user_id] = time.monotonic() + self.window_seconds
+        while len(self._until) > self.max_entries:
+            self._until.popitem(last=False)
+        if self.redis_url:
+            try:
+                await self._client().set(self._key(user_id), "1", px=int(self.window_seconds * 1000))
+            except Exception:
+                logger.warning("recent write mark failed for %s", user_id, exc_info=True)
+
+    async def wrote_recently(self, user_id: uuid.UUID) -> bool:
+        until = self._until.get(user_id)
+        if until is not None:
+            if until > time.monotonic():
+                return True
+            del self._until[user_id]
+        if not self.redis_url:
+            return False
+        try:
+            return bool(await self._client().exists(self._key(user_id)))
+        except Exception:
+            logger.warning("recent write lookup failed for %s, reading from the primary", user_id, exc_info=True)
+            return True
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+recent_writers = RecentWriters(settings.REDIS_URL, settings.READ_AFTER_WRITE_SECONDS)
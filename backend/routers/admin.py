@@ -4,6 +4,8 @@ from sqlalchemy import select
 from database import get_db
 from dependencies import require_active_and_roles, assert_same_tower_or_admin, is_admin_like
 from models import User, UserRole
+from user_cache import CurrentUser, user_cache
+from audit import audit_log
 from pydantic import BaseModel
 from uuid import UUID
 
@@ -15,7 +17,7 @@ class RoleUpdate(BaseModel):
     tower_id: UUID | None = None
 
 @router.post("/assign-role")
-async def assign_role(payload: RoleUpdate, db: AsyncSession = Depends(get_db), actor: User = Depends(require_active_and_roles(UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
+async def assign_role(payload: RoleUpdate, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(require_active_and_roles(UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
     res = await db.execute(select(User).where(User.id == payload.user_id))
     target = res.scalars().first()
     if not target:
@@ -43,6 +45,13 @@ async def assign_role(payload: RoleUpdate, db: AsyncSession = Depends(get_db), a
         if payload.tower_id is not None:
             target.tower_id = payload.tower_id
 
+    previous_role = target.role
     target.role = payload.role
     await db.commit()
+    user_cache.invalidate(target.id)
+    await audit_log.record("user.assign_role", "user", target.id, actor.id, {
+        "previous_role": previous_role,
+        "role": payload.role,
+        "tower_id": str(target.tower_id) if target.tower_id else None,
+    })
     return {"ok": True}
@@ -1,17 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.orm import contains_eager
 from datetime import datetime, date
 from database import get_db
-from dependencies import require_active_and_roles, assert_same_tower_or_admin
+from dependencies import get_read_db, require_active_and_roles, assert_same_tower_or_admin
 from models import (
     User, UserRole, UserStatus,
     SignupApprovalRequest, SignupApprovalStatus,
 )
-from schemas import SignupApprovalRequestResponse
+from schemas import ApplicantSummary, SignupApprovalRequestResponse, SignupApprovalQueueItem, SignupBulkDecision, SignupBulkItem, SignupBulkResponse, SignupDecision
+from booking import adult_birth_cutoff
+from user_cache import CurrentUser, user_cache
+from audit import audit_log
+from pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, NEXT_CURSOR_HEADER, apply_keyset, fetch_page
+from fast_json import dump_rows, model_columns, model_fields, rows_response
+from config import settings
 
 router = APIRouter(prefix="/approvals", tags=["approvals"])
 
+MAX_BULK_DECISIONS = 200
+
+# Queue rows for FAST_LIST_SERIALIZATION: request columns, then the applicant's (prefixed, ids clash)
+REQUEST_FIELDS = model_fields(SignupApprovalRequestResponse)
+APPLICANT_FIELDS = model_fields(ApplicantSummary)
+QUEUE_COLUMNS = model_columns(SignupApprovalRequestResponse, SignupApprovalRequest) + model_columns(ApplicantSummary, User, prefix="applicant_")
+
+BULK_FAILURES = {
+    "not_found": "Approval request not found",
+    "not_pending": "Approval request was already decided",
+    "tower_scope": "Tower scope violation.",
+    "missing_birth_date": "Applicant must set birth_date before approval",
+    "underage": "Applicant must be 18+ to reserve the court",
+}
+
+# Decides a set of requests in one statement. The requests are locked first,
+# so a concurrent decision on the same ids waits and then sees them as no
+# longer pending. The verdict CTE yields the first failing rule per id (or
+# NULL), and only those without one are updated. On approve, their applicants
+# are activated in the same statement.
+_BULK_DECIDE_SQL = text("""
+WITH ids AS (
+    SELECT id, idx FROM unnest(CAST(:ids AS uuid[])) WITH ORDINALITY AS i(id, idx)
+),
+locked AS (
+    SELECT id, applicant_user_id, tower_id, status FROM signup_approval_requests
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+    FOR UPDATE
+),
+verdict AS (
+    SELECT ids.id, ids.idx, r.applicant_user_id,
+        CASE
+            WHEN r.id IS NULL THEN 'not_found'
+            WHEN r.status <> 'pending' THEN 'not_pending'
+            WHEN CAST(:scope_tower_id AS uuid) IS NOT NULL
+                 AND r.tower_id IS DISTINCT FROM CAST(:scope_tower_id AS uuid) THEN 'tower_scope'
+            WHEN :approve AND u.birth_date IS NULL THEN 'missing_birth_date'
+            WHEN :approve AND u.birth_date >= :adult_before THEN 'underage'
+        END AS failure
+    FROM ids
+    LEFT JOIN locked r ON r.id = ids.id
+    LEFT JOIN users u ON u.id = r.applicant_user_id
+),
+decided AS (
+    UPDATE signup_approval_requests r
+    SET status = :new_status, approved_by_user_id = :actor_id, decided_at = :now, note = coalesce(:note, r.note)
+    FROM verdict v
+    WHERE r.id = v.id AND v.failure IS NULL
+    RETURNING r.id
+),
+activated AS (
+    UPDATE users u
+    SET status = 'active', is_verified = true
+    FROM verdict v
+    WHERE :approve AND u.id = v.applicant_user_id AND v.failure IS NULL
+    RETURNING u.id
+)
+SELECT v.id, v.applicant_user_id, v.failure, d.id IS NOT NULL AS decided
+FROM verdict v LEFT JOIN decided d ON d.id = v.id
+ORDER BY v.idx
+""")
+
 def _age_years(birth_date: datetime | None) -> int | None:
     if not birth_date:
         return None
@@ -20,19 +89,79 @@ def _age_years(birth_date: datetime | None) -> int | None:
     years = today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
     return years
 
-@router.get("/pending", response_model=list[SignupApprovalRequestResponse])
-async def list_pending(db: AsyncSession = Depends(get_db), current_user: User = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
-    q = select(SignupApprovalRequest).where(SignupApprovalRequest.status == SignupApprovalStatus.PENDING)
+@router.get("/pending", response_model=list[SignupApprovalQueueItem])
+async def list_pending(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER)),
+):
+    # Applicant summary comes from the same query; walks ix_signup_approval_requests_tower_status_created
+    fast = settings.FAST_LIST_SERIALIZATION
+    if fast:
+        q = select(*QUEUE_COLUMNS).select_from(SignupApprovalRequest).join(SignupApprovalRequest.applicant)
+    else:
+        q = (
+            select(SignupApprovalRequest)
+            .join(SignupApprovalRequest.applicant)
+            .options(contains_eager(SignupApprovalRequest.applicant).load_only(User.id, User.name, User.email, User.phone, User.birth_date))
+        )
+    q = q.where(SignupApprovalRequest.status == SignupApprovalStatus.PENDING)
     # tower scoping for porteiro/subsíndico
     if current_user.role in {UserRole.PORTEIRO, UserRole.SUBSINDICO}:
         if not current_user.tower_id:
             return []
         q = q.where(SignupApprovalRequest.tower_id == current_user.tower_id)
-    res = await db.execute(q.order_by(SignupApprovalRequest.created_at.asc()))
-    return list(res.scalars().all())
+    q = apply_keyset(q, SignupApprovalRequest.created_at, SignupApprovalRequest.id, cursor)
+    page, next_cursor = await fetch_page(db, q, limit or DEFAULT_PAGE_LIMIT, key=lambda r: (r.created_at, r.id), tuples=fast)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if fast:
+        return rows_response(dump_rows(page, REQUEST_FIELDS, ("applicant", APPLICANT_FIELDS)), response)
+    return page
+
+@router.post("/bulk", response_model=SignupBulkResponse)
+async def bulk_decide(payload: SignupBulkDecision, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
+    request_ids = list(dict.fromkeys(payload.request_ids))
+    if len(request_ids) > MAX_BULK_DECISIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_DECISIONS} requests per call")
+
+    # tower scoping for porteiro/subsíndico (checked per request in the statement)
+    scope_tower_id = None
+    if current_user.role in {UserRole.PORTEIRO, UserRole.SUBSINDICO}:
+        if current_user.tower_id is None:
+            raise HTTPException(status_code=403, detail="Tower scope violation.")
+        scope_tower_id = current_user.tower_id
+
+    approve = payload.decision == SignupDecision.APPROVE
+    res = await db.execute(_BULK_DECIDE_SQL, {
+        "ids": request_ids,
+        "scope_tower_id": scope_tower_id,
+        "approve": approve,
+        "adult_before": adult_birth_cutoff(),
+        "new_status": SignupApprovalStatus.APPROVED.value if approve else SignupApprovalStatus.REJECTED.value,
+        "actor_id": current_user.id,
+        "now": datetime.utcnow(),
+        "note": payload.note,
+    })
+    rows = res.all()
+    await db.commit()
+
+    results = []
+    action = "signup.approve" if approve else "signup.reject"
+    for request_id, applicant_user_id, failure, decided in rows:
+        if decided:
+            user_cache.invalidate(applicant_user_id)
+            await audit_log.record(action, "signup_approval_request", request_id, current_user.id, {"applicant_user_id": str(applicant_user_id), "bulk": True})
+            results.append(SignupBulkItem(request_id=request_id, status=SignupApprovalStatus.APPROVED.value if approve else SignupApprovalStatus.REJECTED.value))
+        else:
+            results.append(SignupBulkItem(request_id=request_id, status=failure, detail=BULK_FAILURES[failure]))
+    decided_count = sum(1 for item in results if item.detail is None)
+    return SignupBulkResponse(decided=decided_count, failed=len(results) - decided_count, results=results)
 
 @router.post("/{request_id}/approve", response_model=SignupApprovalRequestResponse)
-async def approve_request(request_id: str, db: AsyncSession = Depends(get_db), current_user: User = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
+async def approve_request(request_id: str, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
     res = await db.execute(select(SignupApprovalRequest).where(SignupApprovalRequest.id == request_id))
     req = res.scalars().first()
     if not req:
@@ -63,11 +192,13 @@ async def approve_request(request_id: str, db: AsyncSession = Depends(get_db), c
     req.decided_at = datetime.utcnow()
 
     await db.commit()
+    user_cache.invalidate(user.id)
+    await audit_log.record("signup.approve", "signup_approval_request", req.id, current_user.id, {"applicant_user_id": str(user.id)})
     await db.refresh(req)
     return req
 
 @router.post("/{request_id}/reject", response_model=SignupApprovalRequestResponse)
-async def reject_request(request_id: str, db: AsyncSession = Depends(get_db), current_user: User = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
+async def reject_request(request_id: str, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(require_active_and_roles(UserRole.PORTEIRO, UserRole.SUBSINDICO, UserRole.SINDICO_GERAL, UserRole.SUPERUSER))):
     res = await db.execute(select(SignupApprovalRequest).where(SignupApprovalRequest.id == request_id))
     req = res.scalars().first()
     if not req:
@@ -79,5 +210,7 @@ async def reject_request(request_id: str, db: AsyncSession = Depends(get_db), cu
     req.approved_by_user_id = current_user.id
     req.decided_at = datetime.utcnow()
     await db.commit()
+    user_cache.invalidate(req.applicant_user_id)
+    await audit_log.record("signup.reject", "signup_approval_request", req.id, current_user.id, {"applicant_user_id": str(req.applicant_user_id)})
     await db.refresh(req)
     return req
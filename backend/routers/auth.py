@@ -1,48 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from dependencies import get_db, get_current_user
+from database import get_sessionmaker, has_read_replica
+from dependencies import get_db, get_current_user, get_read_db, http_401
 from models import User, UserStatus, UserRole
 from schemas import UserResponse
+from user_cache import CurrentUser
 from config import settings
 from security import create_access_token
+from google_auth import GoogleAuthError, exchange_code, verify_id_token
+from replica import recent_writers
 from datetime import timedelta
-import httpx
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.get("/login/google")
 async def login_google():
     return {
-        "url": f"https://accounts.google.com/o/oauth2/v2/auth?response_type=code&client_id={settings.GOOGLE_CLIENT_ID}&redirect_uri={settings.OAUTH_REDIRECT_URI}&scope=openid%20email%20profile"
+        "url": f"{settings.GOOGLE_AUTH_URL}?response_type=code&client_id={settings.GOOGLE_CLIENT_ID}&redirect_uri={settings.OAUTH_REDIRECT_URI}&scope=openid%20email%20profile"
     }
 
 @router.get("/callback/google")
 async def callback_google(code: str, db: AsyncSession = Depends(get_db)):
-    # Exchange code for token
-    async with httpx.AsyncClient() as client:
-        token_res = await client.post("https://oauth2.googleapis.com/token", data={
-            "code": code,
-            "client_id": settings.GOOGLE_CLIENT_ID,
-            "client_secret": settings.GOOGLE_CLIENT_SECRET,
-            "redirect_uri": settings.OAUTH_REDIRECT_URI,
-            "grant_type": "authorization_code"
-        })
-        token_data = token_res.json()
-        
-        if "id_token" not in token_data:
-             raise HTTPException(status_code=400, detail="Invalid code or google error")
-             
-        # Get user info
-        user_res = await client.get("https://www.googleapis.com/oauth2/v2/userinfo", headers={
-            "Authorization": f"Bearer {token_data['access_token']}"
-        })
-        user_info = user_res.json()
-        
+    # Exchange code for token; the profile comes from the verified id_token, no userinfo call
+    try:
+        token_data = await exchange_code(code)
+        user_info = await verify_id_token(token_data["id_token"], token_data.get("access_token"))
+    except GoogleAuthError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
     email = user_info.get("email")
     if not email:
         raise HTTPException(status_code=400, detail="No email found in google profile")
-        
+    if not user_info.get("email_verified", False):
+        raise HTTPException(status_code=400, detail="Google email is not verified")
+
     # Check if user exists
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
@@ -61,6 +53,9 @@ async def callback_google(code: str, db: AsyncSession = Depends(get_db)):
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        if has_read_replica():
+            # The frontend calls /auth/me right away; keep it off the replica until the row is there
+            await recent_writers.mark(user.id)
         
     # Create JWT
     access_token = create_access_token(
@@ -74,5 +69,12 @@ async def callback_google(code: str, db: AsyncSession = Depends(get_db)):
     return RedirectResponse(url=f"{frontend_url}/auth/callback?token={access_token}")
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    user = await db.get(User, current_user.id)
+    if user is None and has_read_replica():
+        # The token was checked against the primary, so the replica is just behind
+        async with get_sessionmaker()() as primary:
+            user = await primary.get(User, current_user.id)
+    if user is None:
+        raise http_401()
+    return user
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import datetime
+from uuid import UUID
+from database import get_db
+from dependencies import get_current_active_user, get_read_db, require_active_and_roles
+from models import BlackoutWindow, UserRole
+from schemas import BlackoutCreate, BlackoutResponse
+from user_cache import CurrentUser
+from blackouts import blackout_index
+from cache import invalidate_blackouts
+from audit import audit_log
+
+router = APIRouter(prefix="/blackouts", tags=["blackouts"])
+
+require_blackout_admin = require_active_and_roles(UserRole.SINDICO_GERAL, UserRole.SUPERUSER)
+
+def _validate_window(payload: BlackoutCreate):
+    if payload.end_time <= payload.start_time:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time")
+
+async def _get_blackout(db: AsyncSession, blackout_id: UUID) -> BlackoutWindow:
+    blackout = await db.get(BlackoutWindow, blackout_id)
+    if not blackout:
+        raise HTTPException(status_code=404, detail="Blackout not found")
+    return blackout
+
+async def _changed():
+    # Booking processes rebuild their blackout tree; availability grids are recomputed
+    await blackout_index.notify_changed()
+    await invalidate_blackouts()
+
+@router.get("", response_model=list[BlackoutResponse])
+async def list_blackouts(
+    include_past: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user),
+):
+    q = select(BlackoutWindow)
+    if not include_past:
+        q = q.where(BlackoutWindow.end_time > datetime.utcnow())
+    res = await db.execute(q.order_by(BlackoutWindow.start_time.asc()))
+    return list(res.scalars().all())
+
+@router.post("", response_model=BlackoutResponse)
+async def create_blackout(payload: BlackoutCreate, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(require_blackout_admin)):
+    _validate_window(payload)
+    blackout = BlackoutWindow(start_time=payload.start_time, end_time=payload.end_time, reason=payload.reason, created_by=actor.id)
+    db.add(blackout)
+    await db.commit()
+    await _changed()
+    await audit_log.record("blackout.create", "blackout", blackout.id, actor.id, {
+        "start_time": payload.start_time.isoformat(),
+        "end_time": payload.end_time.isoformat(),
+    })
+    return blackout
+
+@router.put("/{blackout_id}", response_model=BlackoutResponse)
+async def update_blackout(blackout_id: UUID, payload: BlackoutCreate, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(require_blackout_admin)):
+    _validate_window(payload)
+    blackout = await _get_blackout(db, blackout_id)
+    previous = {"start_time": blackout.start_time.isoformat(), "end_time": blackout.end_time.isoformat()}
+    blackout.start_time = payload.start_time
+    blackout.end_time = payload.end_time
+    blackout.reason = payload.reason
+    await db.commit()
+    await _changed()
+    await audit_log.record("blackout.update", "blackout", blackout.id, actor.id, {
+        "previous": previous,
+        "start_time": payload.start_time.isoformat(),
+        "end_time": payload.end_time.isoformat(),
+    })
+    return blackout
+
+@router.delete("/{blackout_id}")
+async def delete_blackout(blackout_id: UUID, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(require_blackout_admin)):
+    blackout = await _get_blackout(db, blackout_id)
+    await db.delete(blackout)
+    await db.commit()
+    await _changed()
+    await audit_log.record("blackout.delete", "blackout", blackout_id, actor.id)
+    return {"ok": True}
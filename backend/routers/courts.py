@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, union_all, literal, null
+from datetime import date, datetime
+from uuid import UUID
+from database import get_db
+from user_cache import CurrentUser
+from dependencies import get_current_active_user, get_live_user, get_read_db
+from models import Court, Reservation, ReservationStatus, BlackoutWindow
+from schemas import CourtResponse, CourtAvailabilityResponse, LiveTokenResponse
+from availability import SLOT_LEGEND, SlotGrid, parse_slot
+from cache import availability_key, get_cache
+from live import sse_events
+from security import create_live_token
+from config import settings
+
+router = APIRouter(prefix="/courts", tags=["courts"])
+
+MAX_AVAILABILITY_DAYS = 31
+
+@router.get("", response_model=list[CourtResponse])
+async def list_courts(db: AsyncSession = Depends(get_read_db), current_user: CurrentUser = Depends(get_current_active_user)):
+    res = await db.execute(select(Court).where(Court.is_active.is_(True)).order_by(Court.name.asc()))
+    return list(res.scalars().all())
+
+async def _busy_intervals(db: AsyncSession, court_id: UUID, start: date, window_end: datetime) -> list:
+    court = await db.get(Court, court_id)
+    if not court:
+        raise HTTPException(status_code=404, detail="Court not found")
+
+    window_start = datetime.combine(start, datetime.min.time())
+    # Single range query: reservations of this court plus global blackouts
+    reservations_q = select(
+        Reservation.start_time, Reservation.end_time, Reservation.user_id, literal(False).label("is_blackout")
+    ).where(
+        Reservation.court_id == court_id,
+        Reservation.status != ReservationStatus.CANCELLED,
+        Reservation.start_time < window_end,
+        Reservation.end_time > window_start,
+    )
+    blackouts_q = select(
+        BlackoutWindow.start_time, BlackoutWindow.end_time, null(), literal(True)
+    ).where(
+        BlackoutWindow.start_time < window_end,
+        BlackoutWindow.end_time > window_start,
+    )
+    res = await db.execute(union_all(reservations_q, blackouts_q))
+    # JSON-ready rows so they round-trip through the cache unchanged
+    return [
+        [start_time.isoformat(), end_time.isoformat(), str(user_id) if user_id else None, is_blackout]
+        for start_time, end_time, user_id, is_blackout in res.all()
+    ]
+
+@router.get("/{court_id}/availability", response_model=CourtAvailabilityResponse)
+async def court_availability(
+    court_id: UUID,
+    from_: date | None = Query(None, alias="from"),
+    days: int = Query(7, ge=1, le=MAX_AVAILABILITY_DAYS),
+    slot: str = "30m",
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user),
+):
+    try:
+        slot_minutes = parse_slot(slot)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start = from_ or date.today()
+    grid = SlotGrid(start, days, slot_minutes)
+
+    # Busy intervals are shared by every viewer and cached; only the "mine" marks are per user
+    key = await availability_key(court_id, start, days)
+    intervals = await get_cache().get_or_compute(key, lambda: _busy_intervals(db, court_id, start, grid.end))
+    for start_time, end_time, user_id, is_blackout in intervals:
+        start_time, end_time = datetime.fromisoformat(start_time), datetime.fromisoformat(end_time)
+        if is_blackout:
+            grid.mark_blackout(start_time, end_time)
+        else:
+            grid.mark_reserved(start_time, end_time, is_mine=user_id == str(current_user.id))
+
+    return {
+        "court_id": court_id,
+        "start_date": start,
+        "days": days,
+        "slot_minutes": slot_minutes,
+        "legend": SLOT_LEGEND,
+        "grid": grid.encode_days(),
+    }
+
+@router.post("/{court_id}/live/token", response_model=LiveTokenResponse)
+async def court_live_token(court_id: UUID, current_user: CurrentUser = Depends(get_current_active_user)):
+    """Short-lived token for ?token= on the live stream: EventSource can't send an Authorization header.
+
+    It only authorizes the stream of this court; a client whose reconnect is
+    refused once it has expired asks for a new one.
+    """
+    return {"token": create_live_token(current_user.email, court_id), "expires_in": settings.LIVE_TOKEN_SECONDS}
+
+@router.get("/{court_id}/live")
+async def court_live(court_id: UUID, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_live_user)):
+    """Server-Sent Events with the court's slot changes ("reserved", "released", "resync").
+
+    Authenticated by the Authorization header or, from a browser EventSource,
+    by ?token= from POST /courts/{court_id}/live/token.
+    """
+    court = await db.get(Court, court_id)
+    if not court:
+        raise HTTPException(status_code=404, detail="Court not found")
+    # Give the connection back to the pool: the stream can stay open for hours
+    await db.close()
+    return StreamingResponse(
+        sse_events(court_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,65 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from datetime import datetime, timedelta, date
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from uuid import UUID
 from database import get_db
-from dependencies import get_current_active_user, require_active_and_roles, assert_same_tower_or_admin, is_admin_like
-from models import User, UserRole, UserStatus, Reservation, ReservationStatus
-from schemas import ReservationCreate, ReservationResponse
+from user_cache import CurrentUser
+from dependencies import get_current_active_user, get_read_db, get_read_db_sessionmaker
+from models import UserRole, Reservation, ReservationStatus, ReservationEvent, EventType
+from schemas import ReservationCreate, ReservationResponse, ReservationBatchCreate, ReservationBatchItem, ReservationBatchResponse
+from booking import book_reservation, book_batch, event_payload, release_usage, FAILURE_RESPONSES, ITEM_CREATED, MAX_BATCH_OCCURRENCES
+from recurrence import expand_recurrence
+from court_versions import bump_court_days, day_etag, etag_matches
+from cache import get_cache, invalidate_court_days, listing_key
+from live import publish_slot_change
+from audit import audit_log
+from metrics import BOOKINGS
+from pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, NEXT_CURSOR_HEADER, apply_keyset, fetch_page, ndjson_response
+from fast_json import dump_rows, model_columns, model_fields, rows_response
+from config import settings
 
 router = APIRouter(prefix="/reservations", tags=["reservations"])
 
-def _age_ok(user: User) -> bool:
-    if not user.birth_date:
-        return False
-    today = date.today()
-    bd = user.birth_date.date()
-    years = today.year - bd.year - ((today.month, today.day) < (bd.month, bd.day))
-    return years >= 18
+RESERVATION_FIELDS = model_fields(ReservationResponse)
+RESERVATION_COLUMNS = model_columns(ReservationResponse, Reservation)
 
 @router.get("", response_model=list[ReservationResponse])
-async def list_reservations(date_str: str | None = None, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def list_reservations(
+    response: Response,
+    date_str: str | None = None,
+    court_id: UUID | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    if_none_match: str | None = Header(None),
+    # Primary only: a lagging replica would refill the day cache under the new generation with stale rows
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user),
+):
     q = select(Reservation)
+    if court_id:
+        q = q.where(Reservation.court_id == court_id)
     if date_str:
         try:
             d = datetime.fromisoformat(date_str).date()
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid date format, use YYYY-MM-DD")
+        # Day listings are versioned: an unchanged day answers 304 without reading reservations
+        etag = await day_etag(db, d, court_id)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         start = datetime.combine(d, datetime.min.time())
         end = start + timedelta(days=1)
         q = q.where(Reservation.start_time >= start, Reservation.start_time < end)
-    q = q.where(Reservation.status != ReservationStatus.CANCELLED).order_by(Reservation.start_time.asc())
-    res = await db.execute(q)
-    return list(res.scalars().all())
+    q = q.where(Reservation.status != ReservationStatus.CANCELLED)
+    q = apply_keyset(q, Reservation.start_time, Reservation.id, cursor)
+    if format == "ndjson":
+        return ndjson_response(q, ReservationResponse, limit, headers=response.headers)
+    limit = limit or DEFAULT_PAGE_LIMIT
+    fast = settings.FAST_LIST_SERIALIZATION
+
+    async def load_page():
+        if fast:
+            # Cached as the encoded body: a hit is written out as is
+            page, next_cursor = await fetch_page(db, q.with_only_columns(*RESERVATION_COLUMNS), limit, key=lambda r: (r.start_time, r.id), tuples=True)
+            return {"body": dump_rows(page, RESERVATION_FIELDS).decode(), "next": next_cursor}
+        page, next_cursor = await fetch_page(db, q, limit, key=lambda r: (r.start_time, r.id))
+        return {"rows": [ReservationResponse.model_validate(r).model_dump(mode="json") for r in page], "next": next_cursor}
+
+    if date_str:
+        key = await listing_key(d, court_id, cursor, limit)
+        cached = await get_cache().get_or_compute(f"{key}:raw" if fast else key, load_page)
+    else:
+        cached = await load_page()
+    if cached["next"]:
+        response.headers[NEXT_CURSOR_HEADER] = cached["next"]
+    if fast:
+        return rows_response(cached["body"], response)
+    return cached["rows"]
 
 @router.get("/mine", response_model=list[ReservationResponse])
-async def my_reservations(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    res = await db.execute(
-        select(Reservation).where(Reservation.user_id == current_user.id).order_by(Reservation.start_time.desc())
-    )
-    return list(res.scalars().all())
+async def my_reservations(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_read_db),
+    read_sessionmaker: async_sessionmaker = Depends(get_read_db_sessionmaker),
+    current_user: CurrentUser = Depends(get_current_active_user),
+):
+    q = select(Reservation).where(Reservation.user_id == current_user.id)
+    q = apply_keyset(q, Reservation.start_time, Reservation.id, cursor, descending=True)
+    if format == "ndjson":
+        # Same database as the JSON path: the replica unless the user just wrote
+        return ndjson_response(q, ReservationResponse, limit, headers=response.headers, sessionmaker=read_sessionmaker)
+    if settings.FAST_LIST_SERIALIZATION:
+        page, next_cursor = await fetch_page(db, q.with_only_columns(*RESERVATION_COLUMNS), limit or DEFAULT_PAGE_LIMIT, key=lambda r: (r.start_time, r.id), tuples=True)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return rows_response(dump_rows(page, RESERVATION_FIELDS), response)
+    page, next_cursor = await fetch_page(db, q, limit or DEFAULT_PAGE_LIMIT, key=lambda r: (r.start_time, r.id))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page
 
-@router.post("", response_model=ReservationResponse)
-async def create_reservation(payload: ReservationCreate, db: AsyncSession = Depends(get_db), actor: User = Depends(get_current_active_user)):
+def _booking_target(actor: CurrentUser, reserved_for_user_id):
     # Determine target (who is reserving)
-    target_user_id = payload.reserved_for_user_id or actor.id
+    target_user_id = reserved_for_user_id or actor.id
 
-    if payload.reserved_for_user_id and actor.role == UserRole.MORADOR:
+    if reserved_for_user_id and actor.role == UserRole.MORADOR:
         raise HTTPException(status_code=403, detail="Morador can only reserve for themselves.")
 
-    # Load target user
-    res = await db.execute(select(User).where(User.id == target_user_id))
-    target = res.scalars().first()
-    if not target:
-        raise HTTPException(status_code=404, detail="Target user not found")
-    if target.status != UserStatus.ACTIVE:
-        raise HTTPException(status_code=403, detail="Target user is not active")
-    if not _age_ok(target):
-        raise HTTPException(status_code=403, detail="Only 18+ can reserve the court")
-
-    # Tower scoping for porteiro/subsíndico
+    # Tower scoping for porteiro/subsíndico (target tower is checked in the booking statement)
+    scope_tower_id = None
     if actor.role in {UserRole.PORTEIRO, UserRole.SUBSINDICO}:
-        assert_same_tower_or_admin(actor, target.tower_id)
+        if actor.tower_id is None:
+            raise HTTPException(status_code=403, detail="Tower scope violation.")
+        scope_tower_id = actor.tower_id
+    return target_user_id, scope_tower_id
+
+@router.post("", response_model=ReservationResponse)
+async def create_reservation(payload: ReservationCreate, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(get_current_active_user)):
+    target_user_id, scope_tower_id = _booking_target(actor, payload.reserved_for_user_id)
 
     # Validate time window
     if payload.end_time <= payload.start_time:
@@ -69,59 +131,96 @@ async def create_reservation(payload: ReservationCreate, db: AsyncSession = Depe
         # Optional: allow multiple slots, but your rule is 2h/day; single booking could be <=2h
         raise HTTPException(status_code=400, detail="Invalid duration (max 2h per reservation)")
 
-    # 2h/day limit
-    day = payload.start_time.date()
-    day_start = datetime.combine(day, datetime.min.time())
-    day_end = day_start + timedelta(days=1)
-    res = await db.execute(
-        select(func.coalesce(func.sum(func.extract('epoch', Reservation.end_time - Reservation.start_time)), 0))
-        .where(
-            Reservation.user_id == target.id,
-            Reservation.status != ReservationStatus.CANCELLED,
-            Reservation.start_time >= day_start,
-            Reservation.start_time < day_end,
-        )
-    )
-    used_seconds = float(res.scalar() or 0)
-    if used_seconds + duration.total_seconds() > 2 * 3600:
-        raise HTTPException(status_code=400, detail="Daily limit exceeded (max 2h/day)")
-
-    # Overlap check (application-level; you should also add DB constraint)
-    overlap_q = select(Reservation).where(
-        Reservation.court_id == payload.court_id,
-        Reservation.status != ReservationStatus.CANCELLED,
-        Reservation.start_time < payload.end_time,
-        Reservation.end_time > payload.start_time,
-    )
-    res = await db.execute(overlap_q)
-    if res.scalars().first():
-        raise HTTPException(status_code=409, detail="Time slot already reserved")
-
-    r = Reservation(
+    # User checks, 2h/day limit, overlap and insert in a single statement
+    result = await book_reservation(
+        db,
         court_id=payload.court_id,
-        user_id=target.id,
+        user_id=target_user_id,
         created_by_user_id=actor.id,
         start_time=payload.start_time,
         end_time=payload.end_time,
         notes=payload.notes,
-        status=ReservationStatus.CONFIRMED,
+        scope_tower_id=scope_tower_id,
     )
-    db.add(r)
+    BOOKINGS.labels(result.failure.value if result.failure else "created").inc()
+    if result.failure:
+        status_code, detail = FAILURE_RESPONSES[result.failure]
+        raise HTTPException(status_code=status_code, detail=detail)
     await db.commit()
-    await db.refresh(r)
-    return r
+    await invalidate_court_days(payload.court_id, [payload.start_time.date()])
+    await publish_slot_change(payload.court_id, "reserved", result.reservation["id"], payload.start_time, payload.end_time)
+    return result.reservation
+
+@router.post("/batch", response_model=ReservationBatchResponse)
+async def create_reservation_batch(payload: ReservationBatchCreate, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(get_current_active_user)):
+    target_user_id, scope_tower_id = _booking_target(actor, payload.reserved_for_user_id)
+
+    # Either an explicit list of slots or a start/end pair plus a recurrence rule
+    if payload.occurrences and payload.recurrence is None:
+        occurrences = [(o.start_time, o.end_time) for o in payload.occurrences]
+    elif not payload.occurrences and payload.recurrence and payload.start_time and payload.end_time:
+        try:
+            occurrences = expand_recurrence(payload.start_time, payload.end_time, payload.recurrence, MAX_BATCH_OCCURRENCES)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail="Provide either occurrences or start_time, end_time and recurrence")
+    if not occurrences:
+        raise HTTPException(status_code=400, detail="Batch has no occurrences")
+    if len(occurrences) > MAX_BATCH_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_OCCURRENCES} occurrences per batch")
+
+    result = await book_batch(
+        db,
+        court_id=payload.court_id,
+        user_id=target_user_id,
+        created_by_user_id=actor.id,
+        occurrences=occurrences,
+        notes=payload.notes,
+        scope_tower_id=scope_tower_id,
+        all_or_nothing=payload.all_or_nothing,
+    )
+    if result.failure:
+        BOOKINGS.labels(result.failure.value).inc(len(occurrences))
+        status_code, detail = FAILURE_RESPONSES[result.failure]
+        raise HTTPException(status_code=status_code, detail=detail)
+    created = sum(1 for item in result.items if item.status == ITEM_CREATED)
+    if created:
+        await db.commit()
+        await invalidate_court_days(payload.court_id, {item.start_time.date() for item in result.items if item.status == ITEM_CREATED})
+        for item in result.items:
+            if item.status == ITEM_CREATED:
+                await publish_slot_change(payload.court_id, "reserved", item.reservation_id, item.start_time, item.end_time)
+    for item in result.items:
+        BOOKINGS.labels(item.status).inc()
+    return ReservationBatchResponse(
+        created=created,
+        failed=len(result.items) - created,
+        results=[ReservationBatchItem.model_validate(item, from_attributes=True) for item in result.items],
+    )
 
 @router.post("/{reservation_id}/cancel", response_model=ReservationResponse)
-async def cancel_reservation(reservation_id: str, db: AsyncSession = Depends(get_db), actor: User = Depends(get_current_active_user)):
-    res = await db.execute(select(Reservation).where(Reservation.id == reservation_id))
+async def cancel_reservation(reservation_id: str, db: AsyncSession = Depends(get_db), actor: CurrentUser = Depends(get_current_active_user)):
+    # Row lock so two concurrent cancels release the usage counters only once
+    res = await db.execute(select(Reservation).where(Reservation.id == reservation_id).with_for_update())
     r = res.scalars().first()
     if not r:
         raise HTTPException(status_code=404, detail="Reservation not found")
     # Only owner or sindico_geral/superuser can cancel
     if r.user_id != actor.id and actor.role not in {UserRole.SINDICO_GERAL, UserRole.SUPERUSER}:
         raise HTTPException(status_code=403, detail="Insufficient permissions to cancel")
+    if r.status == ReservationStatus.CANCELLED:
+        # Already cancelled: no second event, version bump, publish or audit entry
+        return r
+    await release_usage(db, r.user_id, r.start_time, r.end_time)
     r.status = ReservationStatus.CANCELLED
     r.cancelled_by = actor.id
+    # Outbox row, committed together with the cancellation
+    db.add(ReservationEvent(reservation_id=r.id, type=EventType.CANCELLED, payload=event_payload(r.court_id, r.user_id, r.start_time, r.end_time)))
+    await bump_court_days(db, r.court_id, [r.start_time.date()])
     await db.commit()
+    await invalidate_court_days(r.court_id, [r.start_time.date()])
+    await publish_slot_change(r.court_id, "released", r.id, r.start_time, r.end_time)
+    await audit_log.record("reservation.cancel", "reservation", r.id, actor.id, {"user_id": str(r.user_id), "court_id": str(r.court_id)})
     await db.refresh(r)
     return r
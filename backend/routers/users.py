@@ -3,18 +3,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
 from database import get_db
-from dependencies import get_current_user
+from dependencies import get_current_user_row
 from models import User, UserStatus, SignupApprovalRequest, SignupApprovalStatus
 from schemas import UserResponse, UserProfileUpdate, SignupApprovalRequestCreate, SignupApprovalRequestResponse
+from user_cache import user_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=UserResponse)
-async def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: User = Depends(get_current_user_row)):
     return current_user
 
 @router.patch("/me/profile", response_model=UserResponse)
-async def update_my_profile(payload: UserProfileUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_my_profile(payload: UserProfileUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user_row)):
     # Basic profile fields
     if payload.phone is not None:
         current_user.phone = payload.phone
@@ -27,11 +28,12 @@ async def update_my_profile(payload: UserProfileUpdate, db: AsyncSession = Depen
 
     # If user is pending and has enough info, keep pending but allow approval request
     await db.commit()
+    user_cache.invalidate(current_user.id)
     await db.refresh(current_user)
     return current_user
 
 @router.post("/me/approval-request", response_model=SignupApprovalRequestResponse)
-async def create_or_update_approval_request(payload: SignupApprovalRequestCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_or_update_approval_request(payload: SignupApprovalRequestCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user_row)):
     if not payload.unit_number.strip():
         raise HTTPException(status_code=400, detail="unit_number is required")
 
@@ -63,5 +65,6 @@ async def create_or_update_approval_request(payload: SignupApprovalRequestCreate
 
     current_user.status = UserStatus.PENDING
     await db.commit()
+    user_cache.invalidate(current_user.id)
     await db.refresh(req)
     return req
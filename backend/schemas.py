@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, conint
+from typing import Annotated, Optional, List
+from datetime import datetime, date, timezone
 from uuid import UUID
 from enum import Enum
 
@@ -56,6 +56,22 @@ class CourtResponse(CourtBase):
     class Config:
         from_attributes = True
 
+class DayAvailability(BaseModel):
+    date: date
+    slots: str
+
+class CourtAvailabilityResponse(BaseModel):
+    court_id: UUID
+    start_date: date
+    days: int
+    slot_minutes: int
+    legend: dict[str, str]
+    grid: List[DayAvailability]
+
+class LiveTokenResponse(BaseModel):
+    token: str
+    expires_in: int
+
 # --- Reservation Schemas ---
 
 class UserProfileUpdate(BaseModel):
@@ -87,10 +103,50 @@ class SignupApprovalRequestResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ApplicantSummary(BaseModel):
+    id: UUID
+    name: str
+    email: str
+    phone: Optional[str] = None
+    birth_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SignupApprovalQueueItem(SignupApprovalRequestResponse):
+    applicant: ApplicantSummary
+
+class SignupDecision(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+class SignupBulkDecision(BaseModel):
+    request_ids: List[UUID] = Field(..., min_length=1)
+    decision: SignupDecision
+    note: Optional[str] = None
+
+class SignupBulkItem(BaseModel):
+    request_id: UUID
+    status: str
+    detail: Optional[str] = None
+
+class SignupBulkResponse(BaseModel):
+    decided: int
+    failed: int
+    results: List[SignupBulkItem]
+
+def _naive_utc(v: datetime) -> datetime:
+    if v.tzinfo is not None:
+        return v.astimezone(timezone.utc).replace(tzinfo=None)
+    return v
+
+# Reservation times are stored and compared as naive UTC; offsets sent by clients are converted
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(_naive_utc)]
+
 class ReservationBase(BaseModel):
     court_id: UUID
-    start_time: datetime
-    end_time: datetime
+    start_time: NaiveUTCDatetime
+    end_time: NaiveUTCDatetime
     notes: Optional[str] = None
 
 class ReservationCreate(ReservationBase):
@@ -107,6 +163,46 @@ class ReservationResponse(ReservationBase):
     class Config:
         from_attributes = True
 
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+class RecurrenceRule(BaseModel):
+    freq: RecurrenceFrequency = RecurrenceFrequency.WEEKLY
+    interval: int = Field(1, ge=1)
+    count: Optional[int] = Field(None, ge=1)
+    until: Optional[NaiveUTCDatetime] = None
+    by_weekday: Optional[List[conint(ge=0, le=6)]] = Field(None, description="0=Monday ... 6=Sunday (weekly only)")
+
+class ReservationSlot(BaseModel):
+    start_time: NaiveUTCDatetime
+    end_time: NaiveUTCDatetime
+
+class ReservationBatchCreate(BaseModel):
+    court_id: UUID
+    reserved_for_user_id: Optional[UUID] = None
+    notes: Optional[str] = None
+    # Either an explicit list of slots...
+    occurrences: Optional[List[ReservationSlot]] = None
+    # ...or a first slot plus a recurrence rule
+    start_time: Optional[NaiveUTCDatetime] = None
+    end_time: Optional[NaiveUTCDatetime] = None
+    recurrence: Optional[RecurrenceRule] = None
+    # When true, nothing is booked unless every occurrence is valid
+    all_or_nothing: bool = False
+
+class ReservationBatchItem(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    status: str
+    detail: Optional[str] = None
+    reservation_id: Optional[UUID] = None
+
+class ReservationBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ReservationBatchItem]
+
 # --- Blackout Schemas ---
 class BlackoutBase(BaseModel):
     start_time: datetime
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from statistics import quantiles
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, delete, event
+from database import AsyncSessionLocal, engine
+from models import Court, User, Reservation, ReservationStatus, UserRole, UserStatus
+from booking import book_reservation
+
+# Compares the pre-CTE booking path (user SELECT, SUM, overlap SELECT, INSERT,
+# refresh) with the single-statement path in booking.py, sequentially, against
+# the configured DATABASE_URL. Round-trip savings grow with the network
+# latency to the database, so run it against the real pooler when possible.
+# Usage: python scripts/bench_create_reservation.py [--iterations 300] [--json out.json]
+
+statements = 0
+
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+async def legacy_booking(db, court_id, user_id, start, end):
+    res = await db.execute(select(User).where(User.id == user_id))
+    target = res.scalars().first()
+    day_start = datetime.combine(start.date(), datetime.min.time())
+    res = await db.execute(
+        select(func.coalesce(func.sum(func.extract('epoch', Reservation.end_time - Reservation.start_time)), 0))
+        .where(
+            Reservation.user_id == target.id,
+            Reservation.status != ReservationStatus.CANCELLED,
+            Reservation.start_time >= day_start,
+            Reservation.start_time < day_start + timedelta(days=1),
+        )
+    )
+    res.scalar()
+    res = await db.execute(select(Reservation).where(
+        Reservation.court_id == court_id,
+        Reservation.status != ReservationStatus.CANCELLED,
+        Reservation.start_time < end,
+        Reservation.end_time > start,
+    ))
+    res.scalars().first()
+    r = Reservation(
+        court_id=court_id, user_id=target.id, created_by_user_id=target.id,
+        start_time=start, end_time=end, status=ReservationStatus.CONFIRMED,
+    )
+    db.add(r)
+    await db.commit()
+    await db.refresh(r)
+
+async def single_statement_booking(db, court_id, user_id, start, end):
+    result = await book_reservation(
+        db, court_id=court_id, user_id=user_id, created_by_user_id=user_id, start_time=start, end_time=end,
+    )
+    assert result.failure is None, result.failure
+    await db.commit()
+
+def _summary(samples: list[float], statement_count: int) -> dict:
+    cuts = quantiles(samples, n=100)
+    return {
+        "iterations": len(samples),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "statements_per_booking": round(statement_count / len(samples), 2),
+    }
+
+async def run(iterations: int) -> dict:
+    global statements
+    async with AsyncSessionLocal() as session:
+        court = Court(name=f"Bench {uuid.uuid4().hex[:8]}", is_active=True)
+        session.add(court)
+        users = [
+            User(
+                email=f"bench-{uuid.uuid4().hex[:8]}@example.com", name="Bench", auth_provider="seed",
+                role=UserRole.MORADOR, status=UserStatus.ACTIVE, is_verified=True, birth_date=datetime(1990, 1, 1),
+            )
+            for _ in range(iterations)
+        ]
+        session.add_all(users)
+        await session.commit()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statement)
+    base = datetime.combine(datetime.utcnow().date() + timedelta(days=400), datetime.min.time())
+    report = {}
+    try:
+        for offset, (name, fn) in enumerate([("legacy", legacy_booking), ("single_statement", single_statement_booking)]):
+            samples = []
+            statements = 0
+            for i, user in enumerate(users):
+                # one 30 min slot per user, each path on its own day so they never collide
+                start = base + timedelta(days=offset * 400 + i // 48, minutes=30 * (i % 48))
+                async with AsyncSessionLocal() as session:
+                    t0 = time.perf_counter()
+                    await fn(session, court.id, user.id, start, start + timedelta(minutes=30))
+                    samples.append(time.perf_counter() - t0)
+            report[name] = _summary(samples, statements)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count_statement)
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Reservation).where(Reservation.court_id == court.id))
+            await session.execute(delete(Court).where(Court.id == court.id))
+            await session.execute(delete(User).where(User.id.in_([u.id for u in users])))
+            await session.commit()
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.iterations))
+    for name, stats in report.items():
+        print(f"{name:>16}: p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms mean={stats['mean_ms']}ms statements={stats['statements_per_booking']}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from statistics import median
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import insert, text
+from config import settings
+from database import AsyncSessionLocal
+from models import Court, Reservation, ReservationStatus, SignupApprovalRequest, SignupApprovalStatus, Tower, User, UserRole, UserStatus
+from pagination import MAX_PAGE_LIMIT, NEXT_CURSOR_HEADER
+from security import create_access_token
+from main import app
+
+# Compares the standard list path (ORM objects + response-model validation)
+# with FAST_LIST_SERIALIZATION (column tuples + orjson) on the reservation
+# listings and the approval queue. Each endpoint is paged through completely
+# (pages of MAX_PAGE_LIMIT) in process through the httpx ASGI transport and
+# the process CPU time is reported per 10k rows, so database time only counts
+# as far as the client library spends CPU on it. Both paths must return the
+# same JSON. Seeds its own rows in the configured DATABASE_URL (use a local
+# Postgres) and removes them afterwards.
+# Usage: python scripts/bench_list_serialization.py [--rows 10000] [--rounds 5] [--json out.json]
+
+async def seed(rows: int) -> dict:
+    tag = uuid.uuid4().hex[:8]
+    tower_id, court_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+
+    def user(kind: str, i: int, role: UserRole, status: UserStatus) -> dict:
+        return {
+            "id": uuid.uuid4(),
+            "email": f"bench-{tag}-{kind}-{i}@example.com",
+            "name": f"Bench {kind} {i}",
+            "phone": "+5511999990000",
+            "auth_provider": "seed",
+            "role": role,
+            "status": status,
+            "is_verified": True,
+            "tower_id": tower_id,
+            "unit_number": str(i),
+            "birth_date": datetime(1990, 1, 1),
+            "created_at": now,
+        }
+
+    resident = user("resident", 0, UserRole.MORADOR, UserStatus.ACTIVE)
+    porteiro = user("porteiro", 0, UserRole.PORTEIRO, UserStatus.ACTIVE)
+    applicants = [user("applicant", i, UserRole.MORADOR, UserStatus.PENDING) for i in range(rows)]
+    first = datetime.combine(now.date() + timedelta(days=400), datetime.min.time())
+    reservations = [{
+        "id": uuid.uuid4(),
+        "court_id": court_id,
+        "user_id": resident["id"],
+        "created_by_user_id": resident["id"],
+        "start_time": first + timedelta(hours=i),
+        "end_time": first + timedelta(hours=i, minutes=45),
+        "status": ReservationStatus.CONFIRMED,
+        "notes": "bench" if i % 2 else None,
+        "created_at": now,
+    } for i in range(rows)]
+    requests = [{
+        "id": uuid.uuid4(),
+        "applicant_user_id": a["id"],
+        "tower_id": tower_id,
+        "unit_number": a["unit_number"],
+        "status": SignupApprovalStatus.PENDING,
+        "created_at": now - timedelta(seconds=i),
+    } for i, a in enumerate(applicants)]
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Tower), [{"id": tower_id, "name": f"Bench {tag}"}])
+        await session.execute(insert(Court), [{"id": court_id, "name": f"Bench {tag}", "is_active": True}])
+        for chunk in range(0, len(applicants) + 2, 2000):
+            await session.execute(insert(User), ([resident, porteiro] + applicants)[chunk:chunk + 2000])
+        for chunk in range(0, rows, 2000):
+            await session.execute(insert(Reservation), reservations[chunk:chunk + 2000])
+            await session.execute(insert(SignupApprovalRequest), requests[chunk:chunk + 2000])
+        await session.commit()
+
+    def headers(u: dict) -> dict:
+        return {"Authorization": "Bearer " + create_access_token({"sub": u["email"]}, timedelta(hours=2))}
+
+    return {
+        "tag": tag,
+        "tower_id": tower_id,
+        "court_id": court_id,
+        "user_ids": [resident["id"], porteiro["id"]] + [a["id"] for a in applicants],
+        "endpoints": {
+            "list_reservations": ("/api/v1/reservations", {"court_id": str(court_id)}, headers(resident)),
+            "my_reservations": ("/api/v1/reservations/mine", {}, headers(resident)),
+            "list_pending": ("/api/v1/approvals/pending", {}, headers(porteiro)),
+        },
+    }
+
+async def cleanup(pop: dict):
+    params = {"court": pop["court_id"], "tower": pop["tower_id"], "users": pop["user_ids"]}
+    async with AsyncSessionLocal() as session:
+        for statement in (
+            "DELETE FROM reservations WHERE court_id = :court",
+            "DELETE FROM signup_approval_requests WHERE tower_id = :tower",
+            "DELETE FROM users WHERE id = ANY(CAST(:users AS uuid[]))",
+            "DELETE FROM courts WHERE id = :court",
+            "DELETE FROM towers WHERE id = :tower",
+        ):
+            await session.execute(text(statement), params)
+        await session.commit()
+
+async def walk(client: httpx.AsyncClient, url: str, params: dict, headers: dict) -> tuple[list, float, float]:
+    """Fetch every page; returns the rows, CPU seconds and wall seconds."""
+    rows = []
+    cursor = None
+    cpu, wall = time.process_time(), time.perf_counter()
+    while True:
+        res = await client.get(url, params={**params, "limit": MAX_PAGE_LIMIT, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        res.raise_for_status()
+        rows += res.json()
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    return rows, time.process_time() - cpu, time.perf_counter() - wall
+
+async def run(rows: int, rounds: int) -> dict:
+    pop = await seed(rows)
+    report = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=300) as client:
+            for name, (url, params, headers) in pop["endpoints"].items():
+                results = {}
+                bodies = {}
+                for fast in (False, True):
+                    settings.FAST_LIST_SERIALIZATION = fast
+                    await walk(client, url, params, headers)  # warm up
+                    cpu_samples, wall_samples = [], []
+                    for _ in range(rounds):
+                        body, cpu, wall = await walk(client, url, params, headers)
+                        cpu_samples.append(cpu)
+                        wall_samples.append(wall)
+                    bodies[fast] = body
+                    results["fast" if fast else "standard"] = {
+                        "rows": len(body),
+                        "cpu_ms_per_10k_rows": round(median(cpu_samples) / len(body) * 10000 * 1000, 1),
+                        "wall_ms_per_10k_rows": round(median(wall_samples) / len(body) * 10000 * 1000, 1),
+                    }
+                results["identical_json"] = bodies[False] == bodies[True]
+                results["cpu_saved_pct"] = round(
+                    (1 - results["fast"]["cpu_ms_per_10k_rows"] / results["standard"]["cpu_ms_per_10k_rows"]) * 100, 1
+                )
+                report[name] = results
+    finally:
+        settings.FAST_LIST_SERIALIZATION = False
+        await cleanup(pop)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.rows, args.rounds))
+    for name, results in report.items():
+        print(
+            f"{name:>18}: standard {results['standard']['cpu_ms_per_10k_rows']} ms CPU/10k rows, "
+            f"fast {results['fast']['cpu_ms_per_10k_rows']} ms CPU/10k rows "
+            f"({results['cpu_saved_pct']}% less), identical JSON: {results['identical_json']}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if not all(results["identical_json"] for results in report.values()):
+        raise SystemExit("FAIL: fast path JSON differs from the standard path")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import os
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import delete
+from database import AsyncSessionLocal
+from models import Court, User, Reservation, UserRole, UserStatus
+from security import create_access_token
+from main import app
+
+# Fires many parallel bookings at the same slot through the API and checks
+# that exactly one wins and every other request gets the 409.
+# Usage: python scripts/check_booking_race.py [parallel_requests]
+
+async def check_race(parallel: int):
+    async with AsyncSessionLocal() as session:
+        court = Court(name=f"Race check {uuid.uuid4().hex[:8]}", is_active=True)
+        user = User(
+            email=f"race-{uuid.uuid4().hex[:8]}@example.com",
+            name="Race Check",
+            auth_provider="seed",
+            role=UserRole.MORADOR,
+            status=UserStatus.ACTIVE,
+            is_verified=True,
+            birth_date=datetime(1990, 1, 1),
+        )
+        session.add_all([court, user])
+        await session.commit()
+
+    start = datetime.combine(datetime.utcnow().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=10)
+    payload = {
+        "court_id": str(court.id),
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(hours=1)).isoformat(),
+    }
+    token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=10))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://race", timeout=120) as client:
+            responses = await asyncio.gather(*[
+                client.post("/api/v1/reservations", json=payload, headers=headers) for _ in range(parallel)
+            ])
+        outcomes = Counter(r.status_code for r in responses)
+        print(f"{parallel} parallel bookings -> {dict(outcomes)}")
+        if outcomes.get(200) != 1 or outcomes.get(409) != parallel - 1:
+            raise SystemExit("FAIL: expected exactly one 200 and all others 409")
+        print("OK")
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Reservation).where(Reservation.court_id == court.id))
+            await session.execute(delete(Court).where(Court.id == court.id))
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+if __name__ == "__main__":
+    asyncio.run(check_race(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
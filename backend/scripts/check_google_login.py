@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import json
+import sys
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+from sqlalchemy import delete
+from config import settings
+from database import AsyncSessionLocal
+from models import User
+from main import app
+import google_auth
+
+# Runs the Google login callback against a local fake Google (token endpoint
+# and JWKS on 127.0.0.1) and checks that:
+# - a valid id_token logs in without any userinfo call
+# - logins reuse the same keep-alive connection
+# - keys are fetched once, and refetched on rotation (unknown kid), at most
+#   once per JWKS_MIN_REFRESH_SECONDS
+# - a wrong audience, a wrong issuer, an expired token or a bad signature is rejected
+# Usage: python scripts/check_google_login.py
+
+def _b64(n: int) -> str:
+    return base64.urlsafe_b64encode(n.to_bytes((n.bit_length() + 7) // 8, "big")).decode().rstrip("=")
+
+class FakeGoogle:
+    def __init__(self):
+        self.keys = {}
+        self.codes: dict[str, dict] = {}
+        self.requests: list[str] = []
+        self.client_ports: set[int] = set()
+        self.rotate()
+
+    def rotate(self) -> str:
+        kid = uuid.uuid4().hex[:8]
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        numbers = private.public_key().public_numbers()
+        self.keys[kid] = {
+            "pem": private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()),
+            "jwk": {"kty": "RSA", "alg": "RS256", "use": "sig", "kid": kid, "n": _b64(numbers.n), "e": _b64(numbers.e)},
+        }
+        self.kid = kid
+        return kid
+
+    def issue(self, email: str, **overrides) -> str:
+        """Register a code whose token response carries an id_token with the given claim overrides."""
+        now = int(time.time())
+        access_token = uuid.uuid4().hex
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": settings.GOOGLE_CLIENT_ID,
+            "sub": uuid.uuid4().hex,
+            "email": email,
+            "email_verified": True,
+            "name": "Fake Google User",
+            "iat": now,
+            "exp": now + 3600,
+        }
+        claims.update(overrides.pop("claims", {}))
+        kid = overrides.pop("kid", self.kid)
+        pem = overrides.pop("pem", self.keys[kid]["pem"])
+        id_token = jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid}, access_token=access_token)
+        code = uuid.uuid4().hex
+        self.codes[code] = {"access_token": access_token, "id_token": id_token, "token_type": "Bearer", "expires_in": 3600}
+        return code
+
+    def serve(self) -> ThreadingHTTPServer:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict, headers: dict | None = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                fake.requests.append(f"GET {self.path}")
+                fake.client_ports.add(self.client_address[1])
+                if self.path == "/certs":
+                    self._reply(200, {"keys": [k["jwk"] for k in fake.keys.values()]}, {"Cache-Control": "public, max-age=3600"})
+                else:
+                    self._reply(404, {"error": "not_found"})
+
+            def do_POST(self):
+                fake.requests.append(f"POST {self.path}")
+                fake.client_ports.add(self.client_address[1])
+                form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+                tokens = fake.codes.pop(form.get("code", [""])[0], None)
+                if self.path == "/token" and tokens:
+                    self._reply(200, tokens)
+                else:
+                    self._reply(400, {"error": "invalid_grant"})
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+async def check():
+    fake = FakeGoogle()
+    server = fake.serve()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    settings.GOOGLE_TOKEN_URL = f"{base}/token"
+    settings.GOOGLE_JWKS_URL = f"{base}/certs"
+    email = f"google-{uuid.uuid4().hex[:8]}@example.com"
+    failures = []
+
+    def expect(name: str, ok: bool):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            async def login(code: str) -> httpx.Response:
+                return await client.get("/api/v1/auth/callback/google", params={"code": code})
+
+            res = await login(fake.issue(email))
+            expect("valid id_token logs in", res.status_code == 307 and "token=" in res.headers["location"])
+            res = await login(fake.issue(email))
+            expect("second login", res.status_code == 307)
+            expect("no userinfo call", not any("userinfo" in r for r in fake.requests))
+            expect("JWKS fetched once", fake.requests.count("GET /certs") == 1)
+            expect("one keep-alive connection", len(fake.client_ports) == 1)
+
+            fake.rotate()
+            res = await login(fake.issue(email))
+            expect("unknown kid refetch is rate limited", res.status_code == 400 and fake.requests.count("GET /certs") == 1)
+            # Pretend the min-refresh window has passed
+            google_auth.get_jwks()._fetched_at -= google_auth.JWKS_MIN_REFRESH_SECONDS
+            res = await login(fake.issue(email))
+            expect("rotated key is picked up", res.status_code == 307 and fake.requests.count("GET /certs") == 2)
+
+            for name, code in [
+                ("wrong audience rejected", fake.issue(email, claims={"aud": "someone-else"})),
+                ("wrong issuer rejected", fake.issue(email, claims={"iss": "https://evil.example.com"})),
+                ("expired token rejected", fake.issue(email, claims={"exp": int(time.time()) - 60})),
+                ("unverified email rejected", fake.issue(email, claims={"email_verified": False})),
+                ("bad signature rejected", fake.issue(email, pem=fake.keys[next(iter(fake.keys))]["pem"])),
+                ("unknown code rejected", "not-a-code"),
+            ]:
+                res = await login(code)
+                expect(name, res.status_code == 400)
+    finally:
+        server.shutdown()
+        await google_auth.close_http_client()
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(User).where(User.email == email))
+            await session.commit()
+    if failures:
+        raise SystemExit(f"FAIL: {len(failures)} check(s) failed")
+    print("OK")
+
+if __name__ == "__main__":
+    asyncio.run(check())
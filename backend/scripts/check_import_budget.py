@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Cold-start import budget for the API entry point. Imports `main` in fresh
+# interpreters with `python -X importtime`, fails when the best run exceeds the
+# budget or when modules that are meant to load lazily were imported eagerly.
+# Usage: python scripts/check_import_budget.py [--budget-ms 1200] [--runs 5]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported on first use (login, password hashing, first DB access)
+LAZY_MODULES = ("httpx", "passlib", "asyncpg")
+
+def measure_once(module: str) -> tuple[int, list[tuple[int, str]]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    total = None
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.rstrip()))
+        if name.strip() == module and not name.startswith("  "):
+            total = int(cumulative)
+    if total is None:
+        raise SystemExit(f"Could not find {module} in -X importtime output")
+    return total, modules
+
+def eager_lazy_modules(module: str) -> list[str]:
+    check = (
+        f"import sys, {module}, database\n"
+        f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]\n"
+        "if database._engine is not None: loaded.append('database engine')\n"
+        "print(','.join(loaded))"
+    )
+    proc = subprocess.run([sys.executable, "-c", check], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr[-2000:])
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    best_us, best_modules = min((measure_once(args.module) for _ in range(args.runs)), key=lambda r: r[0])
+    best_ms = best_us / 1000
+    print(f"import {args.module}: {best_ms:.1f}ms (best of {args.runs}, budget {args.budget_ms:.0f}ms)")
+
+    failures = []
+    if best_ms > args.budget_ms:
+        failures.append(f"cold import took {best_ms:.1f}ms, over the {args.budget_ms:.0f}ms budget")
+        print("Heaviest imports (cumulative):")
+        for cumulative, name in sorted(best_modules, reverse=True)[:15]:
+            print(f"  {cumulative / 1000:8.1f}ms {name}")
+    eager = eager_lazy_modules(args.module)
+    if eager:
+        failures.append(f"loaded eagerly at import time: {', '.join(eager)}")
+
+    if failures:
+        raise SystemExit("FAIL: " + "; ".join(failures))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import socket
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from sqlalchemy import insert, text
+from database import AsyncSessionLocal
+from models import Court, Tower, User, UserRole, UserStatus
+from security import create_access_token, create_live_token
+from main import app
+
+# Checks how the live stream (/courts/{id}/live) authenticates:
+# - POST /courts/{id}/live/token hands an active user a token for ?token=,
+#   which opens the stream without an Authorization header (EventSource)
+# - the Authorization header still works
+# - a live token is refused for another court, once expired, and as a
+#   regular access token on other endpoints
+# - no credentials, or a pending user, are refused
+# The app is served by uvicorn on a local port (the ASGI transport would wait
+# for the end of the endless stream). Seeds its own rows in the configured
+# DATABASE_URL and removes them afterwards.
+# Usage: python scripts/check_live_auth.py
+
+async def seed() -> dict:
+    tag = uuid.uuid4().hex[:8]
+    tower_id = uuid.uuid4()
+    courts = [uuid.uuid4(), uuid.uuid4()]
+    emails = {status: f"live-{tag}-{status.value}@example.com" for status in (UserStatus.ACTIVE, UserStatus.PENDING)}
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Tower), [{"id": tower_id, "name": f"Live {tag}"}])
+        await session.execute(insert(Court), [{"id": court_id, "name": f"Live {tag} {i}", "is_active": True} for i, court_id in enumerate(courts)])
+        await session.execute(insert(User), [{
+            "email": email,
+            "name": "Live",
+            "auth_provider": "seed",
+            "role": UserRole.MORADOR,
+            "status": status,
+            "is_verified": True,
+            "tower_id": tower_id,
+            "birth_date": datetime(1990, 1, 1),
+            "created_at": datetime.utcnow(),
+        } for status, email in emails.items()])
+        await session.commit()
+    return {"tower_id": tower_id, "courts": courts, "emails": emails}
+
+async def cleanup(pop: dict):
+    params = {"emails": list(pop["emails"].values()), "courts": pop["courts"], "tower": pop["tower_id"]}
+    async with AsyncSessionLocal() as session:
+        for statement in (
+            "DELETE FROM users WHERE email = ANY(CAST(:emails AS text[]))",
+            "DELETE FROM courts WHERE id = ANY(CAST(:courts AS uuid[]))",
+            "DELETE FROM towers WHERE id = :tower",
+        ):
+            await session.execute(text(statement), params)
+        await session.commit()
+
+async def check():
+    pop = await seed()
+    court, other_court = pop["courts"]
+    active, pending = pop["emails"][UserStatus.ACTIVE], pop["emails"][UserStatus.PENDING]
+    failures = []
+
+    def expect(name: str, ok: bool):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    def bearer(email: str) -> dict:
+        return {"Authorization": "Bearer " + create_access_token({"sub": email}, timedelta(hours=1))}
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{sock.getsockname()[1]}", timeout=10) as client:
+            async def opens(params: dict | None = None, headers: dict | None = None) -> int:
+                # The stream never ends: look at the status and the first chunk only
+                async with client.stream("GET", f"/api/v1/courts/{court}/live", params=params, headers=headers) as res:
+                    if res.status_code == 200:
+                        first = await res.aiter_text().__anext__()
+                        return 200 if first.startswith("retry:") else -1
+                    return res.status_code
+
+            res = await client.post(f"/api/v1/courts/{court}/live/token", headers=bearer(active))
+            token = res.json().get("token") if res.status_code == 200 else None
+            expect("active user gets a live token", token is not None and res.json()["expires_in"] > 0)
+            expect("live token opens the stream without a header", await opens({"token": token}) == 200)
+            expect("Authorization header opens the stream", await opens(headers=bearer(active)) == 200)
+            expect("no credentials refused", await opens() == 401)
+            other = create_live_token(active, other_court)
+            expect("token for another court refused", await opens({"token": other}) == 401)
+            expired = create_access_token({"sub": active, "scope": "live", "court_id": str(court)}, timedelta(seconds=-1))
+            expect("expired live token refused", await opens({"token": expired}) == 401)
+            res = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+            expect("live token refused as an access token", res.status_code == 401)
+            res = await client.post(f"/api/v1/courts/{court}/live/token", headers=bearer(pending))
+            expect("pending user gets no live token", res.status_code == 403)
+            expect("pending user's live token refused", await opens({"token": create_live_token(pending, court)}) == 403)
+    finally:
+        server.should_exit = True
+        await serving
+        await cleanup(pop)
+    if failures:
+        raise SystemExit(f"FAIL: {len(failures)} check(s) failed")
+    print("OK")
+
+if __name__ == "__main__":
+    asyncio.run(check())
@@ -0,0 +1,301 @@
+import argparse
+import asyncio
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import insert, text
+from config import settings
+from database import AsyncSessionLocal
+from metrics import db_stats_scope, instrument_engine
+from models import (
+    BlackoutWindow, Court, Reservation, ReservationStatus, SignupApprovalRequest, SignupApprovalStatus,
+    Tower, User, UserRole, UserStatus,
+)
+from security import create_access_token
+from user_cache import user_cache
+from main import app
+from check_google_login import FakeGoogle
+import google_auth
+
+# SQL statement budget per API route. Every route under /api/v1 is requested
+# once through the httpx ASGI transport, against a seeded population in the
+# configured DATABASE_URL (use a local Postgres, never production), and the
+# statements executed through the engine are counted. A route over its budget
+# fails the run and prints the SQL it ran, which makes N+1s and lazy loads
+# (User.reservations, Reservation.events, ...) easy to spot. The user cache is
+# cleared before every request, so budgets include the auth lookup.
+# A new route without a budget fails the run too.
+# Usage: python scripts/check_query_budgets.py [--sql]
+
+API_PREFIX = "/api/v1"
+
+BUDGETS = {
+    ("GET", "/auth/login/google"): 0,
+    ("GET", "/auth/callback/google"): 3,
+    ("GET", "/auth/me"): 2,
+    ("GET", "/users/me"): 2,
+    ("PATCH", "/users/me/profile"): 4,
+    ("POST", "/users/me/approval-request"): 6,
+    ("GET", "/approvals/pending"): 2,
+    ("POST", "/approvals/bulk"): 2,
+    ("POST", "/approvals/{request_id}/approve"): 6,
+    ("POST", "/approvals/{request_id}/reject"): 4,
+    ("GET", "/reservations"): 3,
+    ("GET", "/reservations/mine"): 2,
+    ("POST", "/reservations"): 3,
+    ("POST", "/reservations/batch"): 8,
+    ("POST", "/reservations/{reservation_id}/cancel"): 7,
+    ("POST", "/admin/assign-role"): 3,
+    ("GET", "/courts"): 2,
+    ("GET", "/courts/{court_id}/availability"): 3,
+    ("GET", "/courts/{court_id}/live"): 2,
+    ("POST", "/courts/{court_id}/live/token"): 1,
+    ("GET", "/blackouts"): 2,
+    ("POST", "/blackouts"): 2,
+    ("PUT", "/blackouts/{blackout_id}"): 3,
+    ("DELETE", "/blackouts/{blackout_id}"): 3,
+}
+
+# Reservations seeded for the resident, enough for an N+1 to blow any budget
+SEEDED_RESERVATIONS = 5
+
+class Population:
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.tower_id = uuid.uuid4()
+        self.court_id = uuid.uuid4()
+        self.users: dict[str, dict] = {}
+        self.request_ids: list[uuid.UUID] = []
+        self.reservation_ids: list[uuid.UUID] = []
+        self.blackout_ids: list[uuid.UUID] = []
+        self.google_email = f"budget-{tag}-google@example.com"
+        # Far enough out to stay clear of real bookings and blackouts
+        self.day = datetime.combine(datetime.utcnow().date() + timedelta(days=90), datetime.min.time())
+
+    def headers(self, who: str) -> dict:
+        return self.users[who]["headers"]
+
+async def seed() -> Population:
+    pop = Population(uuid.uuid4().hex[:8])
+    users = []
+    for who, role, status in [
+        ("resident", UserRole.MORADOR, UserStatus.ACTIVE),
+        ("admin", UserRole.SINDICO_GERAL, UserStatus.ACTIVE),
+        ("porteiro", UserRole.PORTEIRO, UserStatus.ACTIVE),
+        ("newcomer", UserRole.MORADOR, UserStatus.PENDING),
+        ("promoted", UserRole.MORADOR, UserStatus.ACTIVE),
+        ("applicant0", UserRole.MORADOR, UserStatus.PENDING),
+        ("applicant1", UserRole.MORADOR, UserStatus.PENDING),
+        ("applicant2", UserRole.MORADOR, UserStatus.PENDING),
+    ]:
+        row = {
+            "id": uuid.uuid4(),
+            "email": f"budget-{pop.tag}-{who}@example.com",
+            "name": f"Budget {who}",
+            "auth_provider": "seed",
+            "role": role,
+            "status": status,
+            "is_verified": True,
+            "tower_id": pop.tower_id,
+            "unit_number": str(100 + len(users)),
+            "birth_date": datetime(1990, 1, 1),
+            "created_at": datetime.utcnow(),
+        }
+        users.append(row)
+        pop.users[who] = row
+    requests = []
+    for i in range(3):
+        applicant = pop.users[f"applicant{i}"]
+        pop.request_ids.append(uuid.uuid4())
+        requests.append({
+            "id": pop.request_ids[-1],
+            "applicant_user_id": applicant["id"],
+            "tower_id": pop.tower_id,
+            "unit_number": applicant["unit_number"],
+            "status": SignupApprovalStatus.PENDING,
+            "created_at": datetime.utcnow() - timedelta(minutes=i),
+        })
+    reservations = []
+    for i in range(SEEDED_RESERVATIONS):
+        start = pop.day + timedelta(days=i, hours=8)
+        pop.reservation_ids.append(uuid.uuid4())
+        reservations.append({
+            "id": pop.reservation_ids[-1],
+            "court_id": pop.court_id,
+            "user_id": pop.users["resident"]["id"],
+            "created_by_user_id": pop.users["resident"]["id"],
+            "start_time": start,
+            "end_time": start + timedelta(hours=1),
+            "status": ReservationStatus.CONFIRMED,
+            "created_at": datetime.utcnow(),
+        })
+    blackouts = []
+    for i in range(2):
+        start = pop.day + timedelta(days=30 + i)
+        pop.blackout_ids.append(uuid.uuid4())
+        blackouts.append({
+            "id": pop.blackout_ids[-1],
+            "start_time": start,
+            "end_time": start + timedelta(hours=2),
+            "reason": f"Budget {pop.tag}",
+            "created_by": pop.users["admin"]["id"],
+        })
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Tower), [{"id": pop.tower_id, "name": f"Budget {pop.tag}"}])
+        await session.execute(insert(Court), [{"id": pop.court_id, "name": f"Budget {pop.tag}", "is_active": True}])
+        await session.execute(insert(User), users)
+        await session.execute(insert(SignupApprovalRequest), requests)
+        await session.execute(insert(Reservation), reservations)
+        await session.execute(insert(BlackoutWindow), blackouts)
+        await session.commit()
+    for user in users:
+        user["headers"] = {"Authorization": "Bearer " + create_access_token({"sub": user["email"]}, timedelta(hours=1))}
+    return pop
+
+async def cleanup(pop: Population):
+    params = {
+        "users": [u["id"] for u in pop.users.values()],
+        "court": pop.court_id,
+        "tower": pop.tower_id,
+        "reason": f"Budget {pop.tag}",
+        "google_email": pop.google_email,
+    }
+    async with AsyncSessionLocal() as session:
+        for statement in (
+            "DELETE FROM reservation_events WHERE reservation_id IN (SELECT id FROM reservations WHERE court_id = :court)",
+            "DELETE FROM reservations WHERE court_id = :court",
+            "DELETE FROM court_day_versions WHERE court_id = :court",
+            "DELETE FROM blackout_windows WHERE reason = :reason",
+            "DELETE FROM user_daily_usage WHERE user_id = ANY(CAST(:users AS uuid[]))",
+            "DELETE FROM signup_approval_requests WHERE applicant_user_id = ANY(CAST(:users AS uuid[]))",
+            "DELETE FROM users WHERE id = ANY(CAST(:users AS uuid[])) OR email = :google_email",
+            "DELETE FROM courts WHERE id = :court",
+            "DELETE FROM towers WHERE id = :tower",
+        ):
+            await session.execute(text(statement), params)
+        await session.commit()
+
+def cases(pop: Population, google: FakeGoogle) -> list[tuple]:
+    """(method, route, url, caller, json body, expected status) for every budgeted route."""
+    slot = pop.day + timedelta(days=10, hours=18)
+    batch_start = pop.day + timedelta(days=20, hours=18)
+    return [
+        ("GET", "/auth/login/google", "/auth/login/google", None, None, 200),
+        ("GET", "/auth/callback/google", f"/auth/callback/google?code={google.issue(pop.google_email)}", None, None, 307),
+        ("GET", "/auth/me", "/auth/me", "resident", None, 200),
+        ("GET", "/users/me", "/users/me", "resident", None, 200),
+        ("PATCH", "/users/me/profile", "/users/me/profile", "resident", {"phone": "+5511999990000"}, 200),
+        ("POST", "/users/me/approval-request", "/users/me/approval-request", "newcomer",
+         {"tower_id": str(pop.tower_id), "unit_number": "901"}, 200),
+        ("GET", "/approvals/pending", "/approvals/pending", "porteiro", None, 200),
+        ("POST", "/approvals/{request_id}/approve", f"/approvals/{pop.request_ids[0]}/approve", "porteiro", None, 200),
+        ("POST", "/approvals/{request_id}/reject", f"/approvals/{pop.request_ids[1]}/reject", "porteiro", None, 200),
+        ("POST", "/approvals/bulk", "/approvals/bulk", "porteiro",
+         {"request_ids": [str(pop.request_ids[2])], "decision": "approve"}, 200),
+        ("GET", "/reservations", f"/reservations?date_str={pop.day.date().isoformat()}&court_id={pop.court_id}", "resident", None, 200),
+        ("GET", "/reservations/mine", "/reservations/mine", "resident", None, 200),
+        ("POST", "/reservations", "/reservations", "resident",
+         {"court_id": str(pop.court_id), "start_time": slot.isoformat(), "end_time": (slot + timedelta(hours=1)).isoformat()}, 200),
+        ("POST", "/reservations/batch", "/reservations/batch", "resident", {
+            "court_id": str(pop.court_id),
+            "occurrences": [
+                {"start_time": (batch_start + timedelta(days=d)).isoformat(), "end_time": (batch_start + timedelta(days=d, hours=1)).isoformat()}
+                for d in (0, 1)
+            ],
+        }, 200),
+        ("POST", "/reservations/{reservation_id}/cancel", f"/reservations/{pop.reservation_ids[0]}/cancel", "resident", None, 200),
+        ("POST", "/admin/assign-role", "/admin/assign-role", "admin",
+         {"user_id": str(pop.users["promoted"]["id"]), "role": "porteiro"}, 200),
+        ("GET", "/courts", "/courts", "resident", None, 200),
+        ("GET", "/courts/{court_id}/availability", f"/courts/{pop.court_id}/availability?from={pop.day.date().isoformat()}&days=7", "resident", None, 200),
+        # The ASGI transport waits for the whole body, so the endless stream is
+        # measured on its not-found path, which runs the same lookups
+        ("GET", "/courts/{court_id}/live", f"/courts/{uuid.uuid4()}/live", "resident", None, 404),
+        ("POST", "/courts/{court_id}/live/token", f"/courts/{pop.court_id}/live/token", "resident", None, 200),
+        ("GET", "/blackouts", "/blackouts", "resident", None, 200),
+        ("POST", "/blackouts", "/blackouts", "admin", {
+            "start_time": (pop.day + timedelta(days=40)).isoformat(),
+            "end_time": (pop.day + timedelta(days=40, hours=2)).isoformat(),
+            "reason": f"Budget {pop.tag}",
+        }, 200),
+        ("PUT", "/blackouts/{blackout_id}", f"/blackouts/{pop.blackout_ids[0]}", "admin", {
+            "start_time": (pop.day + timedelta(days=41)).isoformat(),
+            "end_time": (pop.day + timedelta(days=41, hours=2)).isoformat(),
+            "reason": f"Budget {pop.tag}",
+        }, 200),
+        ("DELETE", "/blackouts/{blackout_id}", f"/blackouts/{pop.blackout_ids[1]}", "admin", None, 200),
+    ]
+
+def api_routes() -> set[tuple[str, str]]:
+    routes = set()
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path.startswith(API_PREFIX):
+            for method in route.methods:
+                routes.add((method, route.path[len(API_PREFIX):]))
+    return routes
+
+async def run(args) -> list[str]:
+    failures = []
+    routes = api_routes()
+    for method, path in sorted(routes - BUDGETS.keys()):
+        failures.append(f"{method} {path}: no query budget declared")
+    for method, path in sorted(BUDGETS.keys() - routes):
+        failures.append(f"{method} {path}: budget for a route that no longer exists")
+
+    instrument_engine()
+    google = FakeGoogle()
+    server = google.serve()
+    settings.GOOGLE_TOKEN_URL = f"http://127.0.0.1:{server.server_address[1]}/token"
+    settings.GOOGLE_JWKS_URL = f"http://127.0.0.1:{server.server_address[1]}/certs"
+    pop = await seed()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://budget") as client:
+            exercised = set()
+            for method, path, url, who, body, expected in cases(pop, google):
+                exercised.add((method, path))
+                user_cache.clear()
+                with db_stats_scope(record_statements=True) as stats:
+                    res = await client.request(method, API_PREFIX + url, json=body, headers=pop.headers(who) if who else None)
+                budget = BUDGETS.get((method, path))
+                over = budget is not None and stats.queries > budget
+                print(f"{'FAIL' if over else 'ok  '} {stats.queries:>2}/{budget} {method} {path}")
+                if res.status_code != expected:
+                    failures.append(f"{method} {path}: expected status {expected}, got {res.status_code} {res.text[:200]}")
+                if over:
+                    failures.append(f"{method} {path}: {stats.queries} statements, budget {budget}")
+                if over or args.sql:
+                    for i, statement in enumerate(stats.statements, 1):
+                        print(f"       {i:>2}. {' '.join(statement.split())}")
+            for method, path in sorted(BUDGETS.keys() - exercised):
+                failures.append(f"{method} {path}: budget declared but no request exercises it")
+    finally:
+        server.shutdown()
+        await google_auth.close_http_client()
+        await cleanup(pop)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check SQL statements per API route against declared budgets")
+    parser.add_argument("--sql", action="store_true", help="print the SQL of every route, not only the ones over budget")
+    args = parser.parse_args()
+    failures = asyncio.run(run(args))
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        raise SystemExit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import insert, text
+from database import get_read_sessionmaker, get_sessionmaker, has_read_replica
+from models import Court, Reservation, ReservationStatus, Tower, User, UserRole, UserStatus
+from replica import recent_writers
+from security import create_access_token
+from user_cache import user_cache
+from main import app
+
+# Checks read routing with DATABASE_URL and DATABASE_READ_URL pointing at two
+# separate local Postgres instances with the same schema (no replication
+# needed). The same users are seeded in both with a different name, plus a
+# reservation and a just-signed-up user on the primary only, so each response
+# tells which database served it. Checks that:
+# - read-only endpoints read from the replica, NDJSON streams included
+# - after a write, the writer reads from the primary for the window, other users don't
+# - once the window has passed, the writer is back on the replica
+# - /auth/me finds a user the replica does not have yet on the primary
+# Usage: DATABASE_READ_URL=... python scripts/check_read_routing.py [--window 1.0]
+
+async def seed() -> dict:
+    tag = uuid.uuid4().hex[:8]
+    tower_id, court_id = uuid.uuid4(), uuid.uuid4()
+    users = {who: uuid.uuid4() for who in ("writer", "bystander", "newcomer")}
+    start = datetime.combine(datetime.utcnow().date() + timedelta(days=120), datetime.min.time()) + timedelta(hours=9)
+
+    def user_rows(where: str) -> list[dict]:
+        return [{
+            "id": user_id,
+            "email": f"routing-{tag}-{who}@example.com",
+            "name": where,
+            "auth_provider": "seed",
+            "role": UserRole.MORADOR,
+            "status": UserStatus.ACTIVE,
+            "is_verified": True,
+            "tower_id": tower_id,
+            "unit_number": "101",
+            "birth_date": datetime(1990, 1, 1),
+            "created_at": datetime.utcnow(),
+        } for who, user_id in users.items() if where == "primary" or who != "newcomer"]
+
+    for where, sessionmaker in (("primary", get_sessionmaker()), ("replica", get_read_sessionmaker())):
+        async with sessionmaker() as session:
+            await session.execute(insert(Tower), [{"id": tower_id, "name": f"Routing {tag}"}])
+            await session.execute(insert(Court), [{"id": court_id, "name": f"Routing {tag}", "is_active": True}])
+            await session.execute(insert(User), user_rows(where))
+            if where == "primary":
+                await session.execute(insert(Reservation), [{
+                    "court_id": court_id,
+                    "user_id": users["writer"],
+                    "created_by_user_id": users["writer"],
+                    "start_time": start,
+                    "end_time": start + timedelta(hours=1),
+                    "status": ReservationStatus.CONFIRMED,
+                }])
+            await session.commit()
+    return {
+        "tower_id": tower_id,
+        "court_id": court_id,
+        "user_ids": list(users.values()),
+        "headers": {
+            who: {"Authorization": "Bearer " + create_access_token({"sub": f"routing-{tag}-{who}@example.com"}, timedelta(hours=1))}
+            for who in users
+        },
+    }
+
+async def cleanup(pop: dict):
+    params = {"users": pop["user_ids"], "court": pop["court_id"], "tower": pop["tower_id"]}
+    for sessionmaker in (get_sessionmaker(), get_read_sessionmaker()):
+        async with sessionmaker() as session:
+            for statement in (
+                "DELETE FROM reservations WHERE court_id = :court",
+                "DELETE FROM users WHERE id = ANY(CAST(:users AS uuid[]))",
+                "DELETE FROM courts WHERE id = :court",
+                "DELETE FROM towers WHERE id = :tower",
+            ):
+                await session.execute(text(statement), params)
+            await session.commit()
+
+async def check(window: float):
+    if not has_read_replica():
+        raise SystemExit("DATABASE_READ_URL is not set")
+    recent_writers.window_seconds = window
+    pop = await seed()
+    failures = []
+
+    def expect(name: str, ok: bool):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://routing") as client:
+            async def served_by(who: str) -> tuple[str, int] | None:
+                user_cache.clear()
+                me = await client.get("/api/v1/auth/me", headers=pop["headers"][who])
+                mine = await client.get("/api/v1/reservations/mine", headers=pop["headers"][who])
+                streamed = await client.get("/api/v1/reservations/mine", params={"format": "ndjson"}, headers=pop["headers"][who])
+                if len(streamed.text.splitlines()) != len(mine.json()):
+                    return None
+                return me.json()["name"], len(mine.json())
+
+            expect("reads go to the replica", await served_by("writer") == ("replica", 0))
+            res = await client.patch("/api/v1/users/me/profile", json={"phone": "+5511999990000"}, headers=pop["headers"]["writer"])
+            expect("write goes to the primary", res.status_code == 200 and res.json()["name"] == "primary")
+            expect("writer reads from the primary after writing", await served_by("writer") == ("primary", 1))
+            expect("other users still read from the replica", await served_by("bystander") == ("replica", 0))
+            await asyncio.sleep(window + 0.2)
+            expect("writer is back on the replica after the window", await served_by("writer") == ("replica", 0))
+            user_cache.clear()
+            me = await client.get("/api/v1/auth/me", headers=pop["headers"]["newcomer"])
+            expect("user missing on the replica is read from the primary", me.status_code == 200 and me.json()["name"] == "primary")
+    finally:
+        await cleanup(pop)
+    if failures:
+        raise SystemExit(f"FAIL: {len(failures)} check(s) failed")
+    print("OK")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--window", type=float, default=1.0, help="READ_AFTER_WRITE_SECONDS used for the check")
+    args = parser.parse_args()
+    asyncio.run(check(args.window))
@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import subprocess
+import sys
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from statistics import mean, quantiles
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event, insert, text
+from database import AsyncSessionLocal, engine, pool_status
+from models import Court, SignupApprovalRequest, SignupApprovalStatus, Tower, User, UserRole, UserStatus
+from security import create_access_token
+from main import app
+
+# Load test for the API, run in process through the httpx ASGI transport
+# against the configured DATABASE_URL (use a local Postgres, never production).
+# Seeds an isolated population of towers, residents, staff, courts and pending
+# signups, runs the scenarios below with a fixed RNG seed and removes the
+# population afterwards:
+#   stampede   every resident books one of a few freshly opened slots at once
+#   dashboard  residents poll availability, the day listing (with ETags) and their own reservations
+#   approvals  staff browse the pending signup queue of their tower
+# The JSON report has throughput, latency percentiles, status/error mix and
+# SQL statements per request per scenario; --compare prints the change
+# against an earlier report and --max-regression fails the run past a limit.
+# Usage: python scripts/load_test.py [--scenarios stampede,dashboard,approvals]
+#        [--towers 10] [--residents-per-tower 50] [--courts 4] [--concurrency 50]
+#        [--requests 2000] [--json report.json] [--compare baseline.json]
+
+SCENARIOS = ("stampede", "dashboard", "approvals")
+
+_request_queries: contextvars.ContextVar[list | None] = contextvars.ContextVar("load_test_queries", default=None)
+
+def _count_statement(*args):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+class Population:
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.tower_ids: list[uuid.UUID] = []
+        self.court_ids: list[uuid.UUID] = []
+        self.residents: list[dict] = []
+        self.staff: list[dict] = []
+        self.applicant_ids: list[uuid.UUID] = []
+
+def _user_row(tag: str, kind: str, i: int, role: UserRole, status: UserStatus, tower_id: uuid.UUID) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "email": f"load-{tag}-{kind}-{i}@example.com",
+        "name": f"Load {kind} {i}",
+        "auth_provider": "seed",
+        "role": role,
+        "status": status,
+        "is_verified": True,
+        "tower_id": tower_id,
+        "unit_number": str(100 + i),
+        "birth_date": datetime(1990, 1, 1),
+        "created_at": datetime.utcnow(),
+    }
+
+async def seed(args) -> Population:
+    pop = Population(uuid.uuid4().hex[:8])
+    towers, users, requests = [], [], []
+    for t in range(args.towers):
+        tower_id = uuid.uuid4()
+        towers.append({"id": tower_id, "name": f"Load {pop.tag} {t}"})
+        pop.tower_ids.append(tower_id)
+        for i in range(args.residents_per_tower):
+            row = _user_row(pop.tag, f"r{t}", i, UserRole.MORADOR, UserStatus.ACTIVE, tower_id)
+            users.append(row)
+            pop.residents.append(row)
+        for role in (UserRole.PORTEIRO, UserRole.SUBSINDICO):
+            row = _user_row(pop.tag, f"s{t}", len(pop.staff), role, UserStatus.ACTIVE, tower_id)
+            users.append(row)
+            pop.staff.append(row)
+        for i in range(args.pending_per_tower):
+            row = _user_row(pop.tag, f"p{t}", i, UserRole.MORADOR, UserStatus.PENDING, tower_id)
+            users.append(row)
+            pop.applicant_ids.append(row["id"])
+            requests.append({
+                "id": uuid.uuid4(),
+                "applicant_user_id": row["id"],
+                "tower_id": tower_id,
+                "unit_number": row["unit_number"],
+                "status": SignupApprovalStatus.PENDING,
+                "created_at": datetime.utcnow() - timedelta(minutes=i),
+            })
+    admin = _user_row(pop.tag, "admin", 0, UserRole.SINDICO_GERAL, UserStatus.ACTIVE, pop.tower_ids[0])
+    users.append(admin)
+    pop.staff.append(admin)
+    courts = [{"id": uuid.uuid4(), "name": f"Load {pop.tag} court {c}", "is_active": True} for c in range(args.courts)]
+    pop.court_ids = [c["id"] for c in courts]
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Tower), towers)
+        await session.execute(insert(Court), courts)
+        await session.execute(insert(User), users)
+        if requests:
+            await session.execute(insert(SignupApprovalRequest), requests)
+        await session.commit()
+    for user in pop.residents + pop.staff:
+        user["headers"] = {"Authorization": "Bearer " + create_access_token({"sub": user["email"]}, timedelta(hours=2))}
+    return pop
+
+async def cleanup(pop: Population):
+    user_ids = [u["id"] for u in pop.residents + pop.staff] + pop.applicant_ids
+    params = {"users": user_ids, "courts": pop.court_ids, "towers": pop.tower_ids}
+    async with AsyncSessionLocal() as session:
+        for statement in (
+            "DELETE FROM reservation_events WHERE reservation_id IN (SELECT id FROM reservations WHERE court_id = ANY(CAST(:courts AS uuid[])))",
+            "DELETE FROM reservations WHERE court_id = ANY(CAST(:courts AS uuid[]))",
+            "DELETE FROM court_day_versions WHERE court_id = ANY(CAST(:courts AS uuid[]))",
+            "DELETE FROM user_daily_usage WHERE user_id = ANY(CAST(:users AS uuid[]))",
+            "DELETE FROM signup_approval_requests WHERE tower_id = ANY(CAST(:towers AS uuid[]))",
+            "DELETE FROM users WHERE id = ANY(CAST(:users AS uuid[]))",
+            "DELETE FROM courts WHERE id = ANY(CAST(:courts AS uuid[]))",
+            "DELETE FROM towers WHERE id = ANY(CAST(:towers AS uuid[]))",
+        ):
+            await session.execute(text(statement), params)
+        await session.commit()
+
+# --- Scenarios: each returns the request list (method, url, headers, json, label) ---
+
+def stampede_requests(pop: Population, args, rng: random.Random) -> list[tuple]:
+    # One booking per resident over a handful of 1h slots that "just opened"
+    opening = datetime.combine(datetime.utcnow().date() + timedelta(days=60), datetime.min.time()) + timedelta(hours=18)
+    slots = [(court_id, opening + timedelta(hours=h)) for court_id in pop.court_ids for h in range(args.stampede_slots)]
+    out = []
+    for user in pop.residents:
+        court_id, start = rng.choice(slots)
+        body = {"court_id": str(court_id), "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+        out.append(("POST", "/api/v1/reservations", user["headers"], body, "book"))
+    return out
+
+def dashboard_requests(pop: Population, args, rng: random.Random) -> list[tuple]:
+    day = (datetime.utcnow().date() + timedelta(days=60)).isoformat()
+    out = []
+    for _ in range(args.requests):
+        user = rng.choice(pop.residents)
+        court_id = rng.choice(pop.court_ids)
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(("GET", f"/api/v1/courts/{court_id}/availability?from={day}&days=7", user["headers"], None, "availability"))
+        elif kind < 0.8:
+            out.append(("GET", f"/api/v1/reservations?date_str={day}&court_id={court_id}", user["headers"], None, "day_listing"))
+        else:
+            out.append(("GET", "/api/v1/reservations/mine", user["headers"], None, "mine"))
+    return out
+
+def approvals_requests(pop: Population, args, rng: random.Random) -> list[tuple]:
+    return [("GET", "/api/v1/approvals/pending", rng.choice(pop.staff)["headers"], None, "pending") for _ in range(args.requests)]
+
+SCENARIO_BUILDERS = {"stampede": stampede_requests, "dashboard": dashboard_requests, "approvals": approvals_requests}
+
+async def run_scenario(client: httpx.AsyncClient, requests: list[tuple], concurrency: int, start_together: bool) -> dict:
+    latencies, queries, statuses, errors, by_label = [], [], Counter(), Counter(), Counter()
+    etags: dict[tuple, str] = {}
+    pending = iter(requests)
+    gate = asyncio.Event()
+
+    async def worker():
+        if start_together:
+            await gate.wait()
+        for method, url, headers, body, label in pending:
+            headers = dict(headers)
+            etag = etags.get((headers["Authorization"], url))
+            if etag:
+                # Pollers revalidate what they already have
+                headers["If-None-Match"] = etag
+            counter = [0]
+            token = _request_queries.set(counter)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=headers, json=body)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            finally:
+                _request_queries.reset(token)
+            latencies.append(time.perf_counter() - t0)
+            queries.append(counter[0])
+            statuses[str(response.status_code)] += 1
+            by_label[f"{label} {response.status_code}"] += 1
+            if "etag" in response.headers:
+                etags[(headers["Authorization"], url)] = response.headers["etag"]
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    started = time.perf_counter()
+    gate.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return _summary(latencies, queries, statuses, errors, by_label, elapsed)
+
+def _summary(latencies, queries, statuses, errors, by_label, elapsed) -> dict:
+    report = {
+        "requests": len(latencies) + sum(errors.values()),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "status": dict(sorted(statuses.items())),
+        "outcomes": dict(sorted(by_label.items())),
+        "errors": dict(errors),
+    }
+    if len(latencies) >= 2:
+        cuts = quantiles(latencies, n=100)
+        report["latency_ms"] = {
+            "p50": round(cuts[49] * 1000, 2),
+            "p95": round(cuts[94] * 1000, 2),
+            "p99": round(cuts[98] * 1000, 2),
+            "mean": round(mean(latencies) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        }
+        report["db_queries_per_request"] = {
+            "mean": round(mean(queries), 2),
+            "p95": quantiles(queries, n=100)[94],
+            "max": max(queries),
+        }
+    return report
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    pop = await seed(args)
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_statement)
+    report = {
+        "commit": _git_commit(),
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "params": {k: v for k, v in vars(args).items() if k not in ("json_path", "compare")},
+        "scenarios": {},
+    }
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=120) as client:
+            for name in args.scenarios:
+                requests = SCENARIO_BUILDERS[name](pop, args, rng)
+                report["scenarios"][name] = await run_scenario(client, requests, args.concurrency, start_together=name == "stampede")
+        report["pool"] = pool_status()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count_statement)
+        await cleanup(pop)
+    return report
+
+def _pct(new: float, old: float) -> float | None:
+    return round((new - old) / old * 100, 1) if old else None
+
+def compare(report: dict, baseline: dict) -> tuple[list[str], float]:
+    """Lines describing the change per scenario and the worst p95 regression in percent."""
+    lines, worst = [], 0.0
+    for name, stats in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old or "latency_ms" not in stats or "latency_ms" not in old:
+            continue
+        p95 = _pct(stats["latency_ms"]["p95"], old["latency_ms"]["p95"])
+        rps = _pct(stats["throughput_rps"], old["throughput_rps"])
+        q = stats["db_queries_per_request"]["mean"] - old["db_queries_per_request"]["mean"]
+        lines.append(f"{name:>10}: p95 {p95:+}%  throughput {rps:+}%  queries/request {q:+.2f}  (vs {baseline.get('commit')})")
+        worst = max(worst, p95 or 0.0)
+    return lines, worst
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", type=lambda s: [n.strip() for n in s.split(",") if n.strip()], default=list(SCENARIOS))
+    parser.add_argument("--towers", type=int, default=10)
+    parser.add_argument("--residents-per-tower", type=int, default=50)
+    parser.add_argument("--pending-per-tower", type=int, default=40)
+    parser.add_argument("--courts", type=int, default=4)
+    parser.add_argument("--stampede-slots", type=int, default=3, help="1h slots opened per court")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per polling scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, help="fail when a scenario's p95 grows by more than this percent")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    for name, stats in report["scenarios"].items():
+        latency = stats.get("latency_ms", {})
+        queries = stats.get("db_queries_per_request", {})
+        print(
+            f"{name:>10}: {stats['requests']} req in {stats['duration_s']}s = {stats['throughput_rps']} req/s  "
+            f"p50={latency.get('p50')}ms p95={latency.get('p95')}ms p99={latency.get('p99')}ms  "
+            f"queries/request={queries.get('mean')}  status={stats['status']} errors={stats['errors']}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            lines, worst = compare(report, json.load(f))
+        print("\n".join(lines))
+        if args.max_regression is not None and worst > args.max_regression:
+            raise SystemExit(f"FAIL: p95 regressed by {worst}% (limit {args.max_regression}%)")
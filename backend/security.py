@@ -1,18 +1,27 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 ALGORITHM = "HS256"
+# Scope claim of tokens good for one court's live stream only
+LIVE_TOKEN_SCOPE = "live"
+
+_pwd_context = None
+
+def get_pwd_context():
+    # passlib/bcrypt are only needed for password logins, so load them on first use
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -23,3 +32,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGORITHM)
     return encoded_jwt
+
+def create_live_token(email: str, court_id) -> str:
+    """Short-lived token for the live stream of one court, sent as ?token= by EventSource."""
+    return create_access_token(
+        {"sub": email, "scope": LIVE_TOKEN_SCOPE, "court_id": str(court_id)},
+        timedelta(seconds=settings.LIVE_TOKEN_SECONDS),
+    )
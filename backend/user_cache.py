@@ -0,0 +1,69 @@
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from config import settings
+from models import User, UserRole, UserStatus
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Authorization snapshot of the authenticated user, safe to share between requests."""
+    id: uuid.UUID
+    email: str
+    role: UserRole
+    status: UserStatus
+    tower_id: uuid.UUID | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, role=user.role, status=user.status, tower_id=user.tower_id)
+
+class UserCache:
+    """Bounded LRU of CurrentUser keyed by token subject, with a TTL per entry.
+
+    The cache is per process: explicit invalidation covers writes made by this
+    process, and the TTL bounds staleness for writes made by other instances.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CurrentUser]] = OrderedDict()
+        self._subject_by_id: dict[uuid.UUID, str] = {}
+
+    def get(self, subject: str) -> CurrentUser | None:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._drop(subject)
+            return None
+        self._entries.move_to_end(subject)
+        return user
+
+    def put(self, subject: str, user: CurrentUser):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._drop(subject)
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._subject_by_id[user.id] = subject
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def invalidate(self, user_id: uuid.UUID):
+        subject = self._subject_by_id.get(user_id)
+        if subject is not None:
+            self._drop(subject)
+
+    def clear(self):
+        self._entries.clear()
+        self._subject_by_id.clear()
+
+    def _drop(self, subject: str):
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            self._subject_by_id.pop(entry[1].id, None)
+
+user_cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,16 @@
+import logging
+import os
+
+# Jobs run their own event loop each; pooled asyncpg connections cannot cross loops
+os.environ.setdefault("DB_POOL_MODE", "null")
+
+from rq import Worker
+from notifications import NOTIFY_QUEUE, get_redis
+
+# RQ worker for SMS notifications. The scheduler is needed for the delayed
+# per-recipient flushes and for retries with backoff.
+# Usage: python worker.py
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Worker([NOTIFY_QUEUE], connection=get_redis()).work(with_scheduler=True)
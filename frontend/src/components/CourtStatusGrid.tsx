@@ -1,27 +1,125 @@
+"use client";
+
+import { useEffect, useState } from "react";
 import { cn } from "@/lib/utils";
 
-const DAYS = [
-    { label: "DOM", date: "10" },
-    { label: "SEG", date: "11" },
-    { label: "TER", date: "12" },
-    { label: "QUA", date: "13" },
-    { label: "QUI", date: "14", active: true },
-    { label: "SEX", date: "15" },
-    { label: "SÁB", date: "16" },
-];
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api/v1";
+
+const WEEKDAYS = ["DOM", "SEG", "TER", "QUA", "QUI", "SEX", "SÁB"];
 
-const MOCK_SLOTS = [
-    { name: "Manhã", status: ["green", "green", "green", "green", "green", "green"] },
-    { name: "Tarde", status: ["green", "green", "red", "yellow", "green", "green"] },
-    { name: "Noite", status: ["green", "green", "green", "green", "red", "green"] },
+// Hour ranges [start, end) for each period row, using 1h slots
+const PERIODS = [
+    { name: "Manhã", from: 6, to: 12 },
+    { name: "Tarde", from: 12, to: 18 },
+    { name: "Noite", from: 18, to: 24 },
 ];
 
+type DayAvailability = { date: string; slots: string };
+
+type PeriodStatus = "green" | "yellow" | "red" | "blue" | "gray";
+
+// YYYY-MM-DD of the browser's calendar day (toISOString would give the UTC day)
+function isoDay(d: Date): string {
+    const pad = (n: number) => String(n).padStart(2, "0");
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+}
+
+// Parsed as a local date: new Date("YYYY-MM-DD") would be UTC midnight
+function parseDay(day: string): Date {
+    const [y, m, d] = day.split("-").map(Number);
+    return new Date(y, m - 1, d);
+}
+
+function periodStatus(slots: string | undefined, from: number, to: number): PeriodStatus {
+    if (!slots) return "gray";
+    const period = slots.slice(from, to);
+    if (period.includes("M")) return "blue";
+    const free = period.split("").filter((s) => s === "F").length;
+    if (free === period.length) return "green";
+    if (free === 0) return "red";
+    return "yellow";
+}
+
 export function CourtStatusGrid() {
+    const [grid, setGrid] = useState<DayAvailability[]>([]);
+    // The server's today may be another day (timezone, midnight): ask for the days shown here
+    const [firstDay] = useState(() => isoDay(new Date()));
+
+    useEffect(() => {
+        const token = localStorage.getItem("token");
+        if (!token) return;
+        const headers = { Authorization: `Bearer ${token}` };
+        let stopped = false;
+        let source: EventSource | null = null;
+        let reopenTimer: ReturnType<typeof setTimeout> | undefined;
+        let reloadTimer: ReturnType<typeof setTimeout> | undefined;
+
+        const loadGrid = async (courtId: string) => {
+            const res = await fetch(`${API_URL}/courts/${courtId}/availability?from=${firstDay}&days=7&slot=1h`, { headers });
+            if (!res.ok || stopped) return;
+            const data = await res.json();
+            setGrid(data.grid);
+        };
+
+        // A batch booking sends one event per occurrence: reload once for the burst
+        const scheduleReload = (courtId: string) => {
+            clearTimeout(reloadTimer);
+            reloadTimer = setTimeout(() => loadGrid(courtId).catch(() => undefined), 300);
+        };
+
+        // EventSource can't send the Authorization header, so the stream is
+        // opened with a short-lived token from /live/token
+        const openStream = async (courtId: string) => {
+            const res = await fetch(`${API_URL}/courts/${courtId}/live/token`, { method: "POST", headers });
+            if (!res.ok || stopped) return;
+            const { token: liveToken } = await res.json();
+            source = new EventSource(`${API_URL}/courts/${courtId}/live?token=${encodeURIComponent(liveToken)}`);
+            for (const type of ["reserved", "released", "resync"]) {
+                source.addEventListener(type, () => scheduleReload(courtId));
+            }
+            source.onerror = () => {
+                // The browser reconnects by itself; once the token has expired the
+                // reconnect is refused and the source closes, so get a new token
+                if (source?.readyState === EventSource.CLOSED && !stopped) {
+                    reopenTimer = setTimeout(() => {
+                        // Changes made while disconnected were missed
+                        scheduleReload(courtId);
+                        openStream(courtId).catch(() => undefined);
+                    }, 3000);
+                }
+            };
+        };
+
+        (async () => {
+            const courtsRes = await fetch(`${API_URL}/courts`, { headers });
+            if (!courtsRes.ok) return;
+            const courts = await courtsRes.json();
+            if (!courts.length) return;
+            await loadGrid(courts[0].id);
+            await openStream(courts[0].id);
+        })().catch(() => setGrid([]));
+
+        return () => {
+            stopped = true;
+            clearTimeout(reopenTimer);
+            clearTimeout(reloadTimer);
+            source?.close();
+        };
+    }, [firstDay]);
+
+    // Columns follow the dates the server answered for, local dates until it has
+    const first = parseDay(firstDay);
+    const days = Array.from({ length: 7 }, (_, i) => {
+        const day = grid[i]?.date ?? isoDay(new Date(first.getFullYear(), first.getMonth(), first.getDate() + i));
+        const d = parseDay(day);
+        return { key: day, label: WEEKDAYS[d.getDay()], date: String(d.getDate()), active: day === firstDay };
+    });
+
     return (
         <div className="bg-white rounded-3xl p-4 shadow-sm mb-6">
             <div className="grid grid-cols-7 gap-2 mb-4 text-center">
-                {DAYS.map((day) => (
-                    <div key={day.label} className="flex flex-col items-center gap-1">
+                {days.map((day) => (
+                    <div key={day.key} className="flex flex-col items-center gap-1">
                         <span className="text-[10px] font-bold text-gray-400 uppercase">{day.label}</span>
                         <div
                             className={cn(
@@ -38,7 +136,7 @@ export function CourtStatusGrid() {
             </div>
 
             <div className="space-y-2">
-                {MOCK_SLOTS.map((period, idx) => (
+                {PERIODS.map((period, idx) => (
                     <div key={idx} className="flex gap-2 items-center">
                         <span
                             className={cn(
@@ -50,17 +148,22 @@ export function CourtStatusGrid() {
                             {period.name}
                         </span>
                         <div className="grid grid-cols-7 gap-2 flex-1">
-                            {period.status.map((status, i) => (
-                                <div
-                                    key={i}
-                                    className={cn(
-                                        "h-8 rounded-lg w-full",
-                                        status === "green" && "bg-emerald-400",
-                                        status === "red" && "bg-red-500",
-                                        status === "yellow" && "bg-amber-400"
-                                    )}
-                                />
-                            ))}
+                            {days.map((_, i) => {
+                                const status = periodStatus(grid[i]?.slots, period.from, period.to);
+                                return (
+                                    <div
+                                        key={i}
+                                        className={cn(
+                                            "h-8 rounded-lg w-full",
+                                            status === "green" && "bg-emerald-400",
+                                            status === "red" && "bg-red-500",
+                                            status === "yellow" && "bg-amber-400",
+                                            status === "blue" && "bg-blue-500",
+                                            status === "gray" && "bg-gray-200"
+                                        )}
+                                    />
+                                );
+                            })}
                         </div>
                     </div>
                 ))}